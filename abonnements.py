@@ -0,0 +1,134 @@
+import heapq
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les arêtes sont alors renvoyées en array.array
+    np = None
+
+NIVEAUX = ("meilleur", "aretes", "matrice")
+
+# Le suivi garde MARGE fois plus d'arêtes que demandé, pour que les arêtes
+# affaiblies soient remplacées sans reparcourir la matrice
+MARGE = 2
+
+
+class SuiviAretes:
+    """
+    Les `taille` arêtes de plus forte piste, tenues à jour écriture par
+    écriture : aucune arête hors du suivi ne dépasse `seuil`, si bien que
+    seule une arête suivie affaiblie sous ce seuil oblige à reparcourir la
+    matrice (`reconstruire`).
+
+    Les valeurs sont brutes : l'évaporation, qui ne change que le facteur
+    global, ne modifie pas l'ordre des arêtes.
+    """
+
+    def __init__(self, taille):
+        self.taille = taille
+        self.valeurs = {}
+        self.tas = []
+        self.seuil = float("-inf")
+        self.sale = True
+
+    def reconstruire(self, pheromones):
+        n = len(pheromones)
+        if hasattr(pheromones, "paires"):
+            # Stockage triangulaire ou creux (matrices.MatriceCondensee,
+            # MatriceCreuse) : une case par arête stockée
+            valeurs = pheromones.valeurs
+            if np is not None and isinstance(valeurs, np.ndarray):
+                taille = min(self.taille, len(valeurs))
+                indices = np.argpartition(valeurs, -taille)[-taille:] if taille else []
+                meilleures = [(float(valeurs[k]), tuple(map(int, pheromones.paires(int(k))))) for k in indices]
+            else:
+                meilleures = heapq.nlargest(self.taille, ((t, pheromones.paires(k)) for k, t in enumerate(valeurs)))
+        elif np is not None and isinstance(pheromones, np.ndarray):
+            pistes = np.where(np.eye(n, dtype=bool), -np.inf, pheromones).ravel()
+            taille = min(self.taille, len(pistes) - n)
+            indices = np.argpartition(pistes, -taille)[-taille:] if taille else []
+            meilleures = [(float(pistes[k]), divmod(int(k), n)) for k in indices]
+        else:
+            cellules = ((t, (i, j)) for i, ligne in enumerate(pheromones) for j, t in enumerate(ligne) if i != j)
+            meilleures = heapq.nlargest(self.taille, cellules)
+        self.valeurs = {arete: valeur for valeur, arete in meilleures}
+        self.tas = [(valeur, arete) for arete, valeur in self.valeurs.items()]
+        heapq.heapify(self.tas)
+        self.seuil = self.tas[0][0] if len(self.tas) >= self.taille else float("-inf")
+        self.sale = False
+
+    def ecrire(self, aretes, valeurs):
+        # aretes : (i, j) scalaires ou tableaux, valeurs : nouvelles valeurs brutes
+        if self.sale:
+            return
+        if np is not None and np.ndim(valeurs):
+            lignes, colonnes, valeurs = np.broadcast_arrays(aretes[0], aretes[1], valeurs)
+            for i, j, valeur in zip(lignes.tolist(), colonnes.tolist(), valeurs.tolist()):
+                self.ecrire_arete((i, j), valeur)
+        else:
+            self.ecrire_arete((int(aretes[0]), int(aretes[1])), float(valeurs))
+
+    def ecrire_arete(self, arete, valeur):
+        if arete not in self.valeurs and valeur <= self.seuil:
+            return
+        self.valeurs[arete] = valeur
+        heapq.heappush(self.tas, (valeur, arete))
+        if len(self.valeurs) > self.taille:
+            # Retire la plus faible ; les entrées périmées du tas sont ignorées
+            while True:
+                plus_faible, sortante = heapq.heappop(self.tas)
+                if self.valeurs.get(sortante) == plus_faible:
+                    break
+            del self.valeurs[sortante]
+            self.seuil = max(self.seuil, plus_faible)
+        if len(self.tas) > 4 * self.taille:
+            self.tas = [(v, a) for a, v in self.valeurs.items()]
+            heapq.heapify(self.tas)
+
+    def mettre_a_echelle(self, facteur):
+        # Normalisation de la matrice : toutes les valeurs multipliées par facteur > 0
+        self.valeurs = {arete: valeur * facteur for arete, valeur in self.valeurs.items()}
+        self.tas = [(valeur, arete) for arete, valeur in self.valeurs.items()]
+        heapq.heapify(self.tas)
+        self.seuil *= facteur
+
+    def meilleures(self, k, pheromones):
+        """Les k plus fortes arêtes, par valeur décroissante : [(valeur brute, (i, j)), ...]."""
+        if not self.sale:
+            retenues = heapq.nlargest(k, ((v, a) for a, v in self.valeurs.items()))
+            if len(retenues) == min(k, len(self.valeurs)) and (not retenues or retenues[-1][0] >= self.seuil):
+                return retenues
+        self.reconstruire(pheromones)
+        return heapq.nlargest(k, ((v, a) for a, v in self.valeurs.items()))
+
+
+def tableaux_aretes(meilleures, echelle):
+    """(i, j, valeur) sous forme de trois tableaux compacts, en valeurs réelles."""
+    if np is not None:
+        lignes = np.fromiter((i for _, (i, _j) in meilleures), dtype=np.intp, count=len(meilleures))
+        colonnes = np.fromiter((j for _, (_i, j) in meilleures), dtype=np.intp, count=len(meilleures))
+        valeurs = np.fromiter((v for v, _ in meilleures), dtype=float, count=len(meilleures)) * echelle
+        return lignes, colonnes, valeurs
+    lignes = array("l", (i for _, (i, _j) in meilleures))
+    colonnes = array("l", (j for _, (_i, j) in meilleures))
+    valeurs = array("d", (v * echelle for v, _ in meilleures))
+    return lignes, colonnes, valeurs
+
+
+class Abonnement:
+    """
+    Un abonné aux itérations de la colonie, appelé avec (iteration, donnees) :
+
+    - "meilleur" : donnees = (meilleur chemin, meilleure distance) ;
+    - "aretes" : donnees = (i, j, valeurs), les k plus fortes pistes ;
+    - "matrice" : donnees = instantané complet, toutes les `intervalle`
+      itérations seulement.
+    """
+
+    def __init__(self, callback, niveau, k, intervalle):
+        if niveau not in NIVEAUX:
+            raise ValueError(f"Niveau d'abonnement inconnu : {niveau!r} (attendu : {', '.join(NIVEAUX)})")
+        self.callback = callback
+        self.niveau = niveau
+        self.k = k
+        self.intervalle = intervalle
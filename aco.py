@@ -2,9 +2,103 @@ import flet as ft
 import random
 import math
 import time
+import heapq
+import asyncio
+import threading
+import weakref
+from array import array
+from collections import namedtuple
+
+from echantillonneurs import alea, creer_echantillonneur
+from parallele import PoolFourmis, PoolThreads, construire_fourmis, gil_actif, graine_fourmi
+from recherche_locale import RECHERCHES, ameliorer
+from instantanes import Instantane
+from abonnements import MARGE, Abonnement, SuiviAretes, tableaux_aretes
+from matrices import BLOC, HeuristiqueCalculee, MatriceCompacte, MatriceCondensee, MatriceCreuse, graphe_candidats
+from fichiers import FichierPheromones
+from voisinage import GrilleSpatiale
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : seul le moteur "python" est alors disponible
+    np = None
+
+MOTEURS = ("python", "numpy", "batch")
+BACKENDS = ("processus", "threads")
+VARIANTES = ("as", "acs", "mmas")
+DEPOTS_MMAS = ("iteration", "global")
+
+# Les phéromones sont stockées en valeurs brutes multipliées par un facteur
+# global : sous ce seuil le facteur est replié dans la matrice pour que
+# brut ** alpha reste représentable
+ECHELLE_MIN = 1e-12
+
+# Taille des listes de voisins de la recherche locale sans n_candidates
+N_VOISINS_RECHERCHE = 10
+
+# Nombre de pas de construction entre deux vérifications de l'arrêt
+PAS_ARRET = 64
+
+# Résultat de solve() : meilleur chemin, raison de l'arrêt ("iterations",
+# "temps", "cible", "stagnation" ou "arret") et durées en secondes
+Solution = namedtuple("Solution", "chemin distance raison iterations duree durees")
+
+# Produit par iterate() : meilleur chemin de l'itération, meilleur global et
+# durée de l'itération
+Iteration = namedtuple("Iteration", "numero chemin distance meilleur_chemin meilleure_distance duree")
+
+# Agrégats tenus à jour à chaque dépôt et évaporation, joints aux instantanés
+Statistiques = namedtuple("Statistiques", "iteration total moyenne maximum distance_iteration meilleure_distance")
+
+# Seuil lambda du facteur de branchement (Gambardella et Dorigo)
+LAMBDA_BRANCHEMENT = 0.05
+
+class IterationAnnulee(Exception):
+    """Arrêt demandé pendant une itération : celle-ci est abandonnée."""
+
+
+class ArretCombine:
+    """Événement d'arrêt levé dès que l'un des événements donnés l'est."""
+
+    def __init__(self, *evenements):
+        self.evenements = [evenement for evenement in evenements if evenement is not None]
+
+    def is_set(self):
+        return any(evenement.is_set() for evenement in self.evenements)
+
 
 class AntColony:
-    def __init__(self, distances, n_ants, n_best, n_iterations, decay, alpha=1, beta=2):
+    def __init__(self, distances, n_ants, n_best, n_iterations, decay, alpha=1, beta=2, engine="python", seed=None,
+                 n_candidates=None, sampler="cumul", workers=None, backend="processus",
+                 local_search=None, n_local_search=None, variant="as", q0=0.9, xi=0.1, tau0=None,
+                 p_best=0.05, stagnation=50, mmas_deposit="iteration", symmetric=False,
+                 pheromone_file=None, checkpoint_every=1, sparse=False, coordinates=None):
+        if engine not in MOTEURS:
+            raise ValueError(f"Moteur inconnu : {engine!r} (attendu : {', '.join(MOTEURS)})")
+        if engine != "python" and np is None:
+            raise ImportError(f"Le moteur {engine!r} nécessite NumPy")
+        if local_search is not None and local_search not in RECHERCHES:
+            raise ValueError(f"Recherche locale inconnue : {local_search!r} (attendu : {', '.join(RECHERCHES)})")
+        if variant not in VARIANTES:
+            raise ValueError(f"Variante inconnue : {variant!r} (attendu : {', '.join(VARIANTES)})")
+        if mmas_deposit not in DEPOTS_MMAS:
+            raise ValueError(f"Dépôt MMAS inconnu : {mmas_deposit!r} (attendu : {', '.join(DEPOTS_MMAS)})")
+        if variant == "acs" and workers is not None:
+            # La mise à jour locale modifie les phéromones pendant la construction
+            raise ValueError("la variante \"acs\" construit les fourmis en série (workers=None)")
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu : {backend!r} (attendu : {', '.join(BACKENDS)})")
+        if workers is not None and engine == "batch":
+            raise ValueError("workers est incompatible avec engine=\"batch\"")
+        if workers is not None and backend == "processus" and engine != "numpy":
+            raise ValueError("le backend \"processus\" nécessite engine=\"numpy\"")
+        if pheromone_file is not None and (engine == "python" or symmetric):
+            raise ValueError("pheromone_file nécessite un moteur NumPy et une matrice pleine (symmetric=False)")
+        if sparse and (engine == "python" or n_candidates is None or symmetric or pheromone_file is not None):
+            raise ValueError("sparse nécessite un moteur NumPy, n_candidates, symmetric=False et pheromone_file=None")
+        if sparse and workers is not None and backend == "processus":
+            raise ValueError("sparse est incompatible avec le backend \"processus\"")
+        self.engine = engine
         self.distances = distances
         self.n_ants = n_ants
         self.n_best = n_best
@@ -14,10 +108,362 @@ class AntColony:
         self.beta = beta
         self.meilleur_chemin= None
         self.meilleure_distance=math.inf
+        self.distance_iteration = math.inf
+        self.iterations_sans_amelioration = 0
+        # "pret", "en cours", "termine" ou "annule" ; l'événement d'arrêt et
+        # l'échéance (time.perf_counter()) ne sont connus que pendant solve()
+        self.statut = "pret"
+        self._evenement_arret = None
+        self._echeance = None
+
+        # Mode symétrique : tau[i][j] et tau[j][i] sont une même piste, stockée
+        # une fois dans le triangle supérieur (matrices.MatriceCondensee) ; les
+        # distances peuvent l'être aussi (matrice_distances(..., condensee=True))
+        self.symmetric = symmetric
+
+        # Phéromones sur disque (voir fichiers.py) : le fichier sert d'état,
+        # sauvegardé toutes les `checkpoint_every` itérations et repris à
+        # la création d'une colonie sur le même fichier
+        self._fichier = None
+        self.checkpoint_every = checkpoint_every
+
+        # Mode creux : phéromones stockées sur le seul graphe des candidats et
+        # du chemin du plus proche voisin (matrices.MatriceCreuse), les autres
+        # arêtes partageant une même valeur ; eta^beta et la matrice
+        # choice-info sont alors calculés à la demande hors du graphe
+        self._creuse = sparse
+        candidats = chemin_pv = None
+
+        # Coordonnées des villes (données, ou celles d'un oracle) : index
+        # spatial (voisinage.py) pour les listes de candidats et le chemin du
+        # plus proche voisin, sans parcourir la matrice des distances. Les
+        # points d'un oracle ne servent que s'ils sont du plan (n x 2)
+        if coordinates is None:
+            points = getattr(distances, "points", None)
+            if points is not None and np.ndim(points) == 2 and np.shape(points)[1] == 2:
+                coordinates = points
+        self._index = None if coordinates is None else GrilleSpatiale(coordinates)
 
         n=len(self.distances)
         self.all_indices= range(n)
-        self.pheromones = [[1.0 for j in range(n)] for i in range(n)]
+        if self.engine == "python":
+            # Un seul tampon array('d') (matrices.MatriceCompacte) plutôt
+            # qu'une liste de listes de floats : même accès ligne[j]
+            if symmetric:
+                self._pheromones = MatriceCondensee.pleine(n, 1.0, numpy=False)
+            else:
+                self._pheromones = MatriceCompacte.pleine(n, 1.0)
+        else:
+            if hasattr(distances, "pairs"):
+                # Oracle (voir matrices.OracleDistances) : aucune matrice des
+                # distances, les lignes sont calculées à la demande
+                self._distances = distances
+            elif isinstance(distances, np.memmap):
+                # Fichier projeté en mémoire : lu page par page, sans copie
+                self._distances = distances
+            else:
+                # Un tableau float32 (voir matrices.py) garde son type
+                self._distances = np.asarray(distances)
+                if self._distances.dtype.kind != "f":
+                    self._distances = self._distances.astype(float)
+            if pheromone_file is not None:
+                self._fichier = FichierPheromones(pheromone_file, n)
+                self._pheromones = self._fichier.pheromones
+            elif sparse:
+                candidats = self.calculer_candidats(n_candidates)
+                chemin_pv = self.chemin_plus_proche_voisin()
+                indptr, indices = graphe_candidats(candidats, [chemin_pv[0]])
+                self._pheromones = MatriceCreuse(indptr, indices, np.ones(len(indices)))
+            else:
+                self._pheromones = MatriceCondensee.pleine(n) if symmetric else np.ones((n, n))
+        if self.engine == "batch":
+            # Le moteur "batch" tire avec NumPy ; sans graine explicite, la
+            # graine vient du module random pour que random.seed() suffise
+            self._rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        # Moteurs "python" et "numpy" en série : flux propre à la colonie si
+        # un seed est donné, sinon le module random
+        self._aleatoire = random if seed is None else random.Random(seed)
+
+        # Construction répartie sur `workers` processus ou threads, un flux
+        # aléatoire par fourmi : le même seed donne les mêmes chemins quels
+        # que soient workers et backend
+        self.workers = workers
+        self.backend = backend
+        self._pool = None
+        if workers is not None:
+            self._graine = random.getrandbits(64) if seed is None else seed
+            self._n_constructions = 0
+
+        self._echelle = 1.0
+        self._depots = False
+
+        # Instantanés publiés en fin d'itération (voir instantanes.py) : le
+        # dernier publié, le dernier remis à un lecteur, et le second tampon
+        # de la copie sur écriture
+        self._verrou = threading.Lock()
+        self._publie = self._pris = self._reserve = None
+        self._lecteurs = weakref.WeakSet()
+        self.iterations_faites = 0
+
+        # Somme et maximum des phéromones brutes, mis à jour à chaque
+        # écriture ; l'évaporation ne touche que le facteur global. Un
+        # maximum à None (arête maximale affaiblie) est recalculé à la demande
+        self._somme_brute = float(n * (n - 1) if symmetric else n * n)
+        self._max_brut = 1.0
+
+        # Abonnés (voir abonnements.py) et suivi des plus fortes arêtes, créé
+        # au premier abonné "aretes"
+        self._abonnements = []
+        self._suivi = None
+
+        # Ant Colony System : règle pseudo-aléatoire proportionnelle (q0),
+        # mise à jour locale (xi) vers tau0, dépôt global du meilleur chemin
+        self.variant = variant
+        self.q0 = q0
+        self.xi = xi
+        self.tau0 = tau0
+
+        # MAX-MIN Ant System : un seul chemin dépose, pistes bornées à
+        # [tau_min, tau_max], réinitialisation après `stagnation` itérations
+        # sans amélioration
+        self.p_best = p_best
+        self.stagnation = stagnation
+        self.mmas_deposit = mmas_deposit
+        self.tau_min = 0.0
+        self.tau_max = math.inf
+        self.n_reinitialisations = 0
+
+        if self._index is not None:
+            # Le chemin du plus proche voisin, quasi immédiat avec l'index,
+            # sert de première solution et d'échelle aux phéromones (y
+            # compris en "as", qui sinon part de 1 quelle que soit l'instance)
+            chemin_pv = chemin_pv or self.chemin_plus_proche_voisin()
+            self.meilleur_chemin, self.meilleure_distance = chemin_pv
+        if variant != "as" or self._index is not None:
+            if self.tau0 is None:
+                longueur_pv = (chemin_pv or self.chemin_plus_proche_voisin())[1]
+                if variant == "mmas":
+                    self.tau0 = 1.0 / ((1 - decay) * longueur_pv)
+                else:
+                    self.tau0 = 1.0 / (n * longueur_pv)
+            # Toutes les phéromones valent 1 : le facteur global suffit à les porter à tau0
+            self._echelle = self.tau0
+        if self._fichier is not None and self._fichier.etat is not None:
+            self.reprendre(self._fichier.etat)
+        self.echantillonneur = creer_echantillonneur(sampler)
+        if sparse and self.echantillonneur.statique:
+            raise ValueError(f"L'échantillonneur {sampler!r} prépare des tables n x n : incompatible avec sparse")
+
+        # Matrice "choice-info" tau^alpha * eta^beta : eta^beta est calculé une
+        # fois, le produit n'est mis à jour que là où les phéromones changent
+        self._heuristique = self._choix = None
+        self.calculer_heuristique()
+        self.calculer_choix()
+
+        # Listes de candidats : les k plus proches voisins de chaque ville
+        self.n_candidates = n_candidates
+        if candidats is None and n_candidates is not None:
+            candidats = self.calculer_candidats(n_candidates)
+        self.candidats = candidats
+
+        # Recherche locale entre construction et dépôt, sur les n_local_search
+        # meilleures fourmis (toutes si None) ; durées cumulées par étape
+        self.local_search = local_search
+        self.n_local_search = n_local_search
+        self._voisins_recherche = None
+        self.durees = {"construction": 0.0, "recherche_locale": 0.0}
+
+    @property
+    def pheromones(self):
+        # Valeurs réelles : le facteur global est replié avant lecture. Sur
+        # disque, une copie mise à l'échelle (le fichier garde son facteur)
+        if self._fichier is not None:
+            return np.asarray(self._pheromones) * self._echelle
+        self.normaliser_pheromones()
+        return self._pheromones
+
+    @pheromones.setter
+    def pheromones(self, valeurs):
+        valeurs = self.convertir_pheromones(valeurs)
+        if self._fichier is not None:
+            # Recopiées dans le fichier, qui reste la mémoire de la colonie,
+            # en valeurs brutes sous le facteur global sauvegardé
+            self.proteger_instantane()
+            np.divide(valeurs, self._echelle, out=self._pheromones)
+        else:
+            self._pheromones = valeurs
+            self._echelle = 1.0
+        self._depots = True
+        self.calculer_choix()
+        self.recalculer_statistiques()
+        if self._suivi is not None:
+            self._suivi.sale = True
+        # Le facteur global sauvegardé doit suivre toute écriture du fichier
+        self.sauvegarder()
+
+    def convertir_pheromones(self, valeurs):
+        # Nouvelles valeurs dans le stockage courant des phéromones : le
+        # moteur et les variantes n'indexent que celui-là
+        actuelles = self._pheromones
+        n = len(actuelles)
+        if isinstance(actuelles, (MatriceCondensee, MatriceCreuse)):
+            # Triangle ou graphe : ne se déduit pas d'une matrice pleine
+            if type(valeurs) is not type(actuelles) or valeurs.n != n or len(valeurs.valeurs) != len(actuelles.valeurs):
+                raise ValueError(f"Phéromones {type(valeurs).__name__}, attendu {type(actuelles).__name__} "
+                                 f"de même structure ({n} villes)")
+            return valeurs
+        if isinstance(actuelles, MatriceCompacte):
+            if not isinstance(valeurs, MatriceCompacte):
+                valeurs = MatriceCompacte.depuis_lignes(valeurs)
+            forme = (valeurs.n, len(valeurs.valeurs) // max(valeurs.n, 1))
+        else:
+            valeurs = np.asarray(valeurs, dtype=float)
+            forme = valeurs.shape
+        if forme != (n, n):
+            raise ValueError(f"Phéromones {forme}, attendu {(n, n)}")
+        return valeurs
+
+    def normaliser_pheromones(self):
+        if self._echelle == 1.0:
+            return
+        self.proteger_instantane()
+        facteur, self._echelle = self._echelle, 1.0
+        if self._fichier is not None:
+            # Sur disque : repli par copie, sûr face à un arrêt brutal
+            self._fichier.replier(facteur, self.etat_sauvegarde())
+        else:
+            self._pheromones *= facteur
+        if self._suivi is not None:
+            self._suivi.mettre_a_echelle(facteur)
+        self.calculer_choix()
+        # Recalcul exact au passage, ce qui efface la dérive des mises à jour
+        self.recalculer_statistiques()
+
+    def calculer_heuristique(self):
+        if self.engine == "python":
+            # Tampon array('d') comme les phéromones (matrices.MatriceCompacte),
+            # rempli ligne par ligne
+            if self._heuristique is None:
+                self._heuristique = MatriceCompacte.pleine(len(self.distances))
+            for i, ligne in enumerate(self._heuristique):
+                distances = self.distances[i]
+                ligne[:] = array("d", (0.0 if i == j else (1.0 / distances[j]) ** self.beta for j in self.all_indices))
+        elif self._creuse:
+            self._heuristique = HeuristiqueCalculee(self._distances, self.beta)
+        else:
+            # Par blocs de lignes, sur place : la matrice peut être en mémoire
+            # partagée, et les distances venir d'un oracle
+            n = len(self._distances)
+            if self._heuristique is None:
+                self._heuristique = self.allouer("heuristique", (n, n), self._distances.dtype)
+            for debut in range(0, n, BLOC):
+                with np.errstate(divide="ignore"):
+                    self._heuristique[debut:debut + BLOC] = (1.0 / self._distances[debut:debut + BLOC]) ** self.beta
+            np.fill_diagonal(self._heuristique, 0.0)
+        self._beta_choix = self.beta
+        if self.echantillonneur.statique:
+            self.echantillonneur.preparer(self._heuristique)
+
+    def calculer_choix(self):
+        if self.beta != self._beta_choix:
+            self.calculer_heuristique()
+        if self.engine == "python":
+            if self._choix is None:
+                self._choix = MatriceCompacte.pleine(len(self._heuristique))
+            for ligne_c, ligne_t, ligne_h in zip(self._choix, self._pheromones, self._heuristique):
+                ligne_c[:] = array("d", (t ** self.alpha * h for t, h in zip(ligne_t, ligne_h)))
+        elif self._creuse:
+            # Produit sur les seules arêtes du graphe ; ailleurs defaut^alpha * eta^beta
+            P = self._pheromones
+            self._choix = P.avec(P.valeurs ** self.alpha * self._heuristique[P.paires(slice(None))],
+                                 P.defaut ** self.alpha, self._heuristique)
+        elif self.symmetric or self._fichier is not None:
+            # Par blocs de lignes, sans matrice temporaire n x n : phéromones
+            # dépliées (mode symétrique) ou lues depuis le disque
+            n = len(self._heuristique)
+            if self._choix is None:
+                self._choix = self.allouer("choix", (n, n), float)
+            for debut in range(0, n, BLOC):
+                np.multiply(self._pheromones[debut:debut + BLOC] ** self.alpha, self._heuristique[debut:debut + BLOC],
+                            out=self._choix[debut:debut + BLOC])
+        elif self._choix is None:
+            self._choix = self._pheromones ** self.alpha * self._heuristique
+        else:
+            np.multiply(self._pheromones ** self.alpha, self._heuristique, out=self._choix)
+        self._alpha_choix = self.alpha
+
+    def allouer(self, nom, forme, dtype):
+        # Matrice de travail : en mémoire, ou à côté du fichier des phéromones
+        if self._fichier is not None:
+            return self._fichier.tampon(nom, forme, dtype)
+        return np.empty(forme, dtype=dtype)
+
+    def recopier_choix(self, ville1, ville2):
+        # Mode symétrique : (ville2, ville1) partage la piste de (ville1, ville2)
+        if self.engine == "python":
+            self._choix[ville2][ville1] = self._choix[ville1][ville2]
+        else:
+            self._choix[ville2, ville1] = self._choix[ville1, ville2]
+
+    def orienter(self, aretes):
+        # Clé d'une arête pour le suivi : (min, max) en mode symétrique
+        if not self.symmetric or aretes is None:
+            return aretes
+        ville1, ville2 = aretes
+        if self.engine == "python":
+            return (min(ville1, ville2), max(ville1, ville2))
+        return (np.minimum(ville1, ville2), np.maximum(ville1, ville2))
+
+    def verifier_choix(self):
+        # alpha ou beta modifiés depuis le dernier calcul (entre deux run)
+        if self.alpha != self._alpha_choix or self.beta != self._beta_choix:
+            self.calculer_choix()
+
+    def tirage_statique(self):
+        # Tant qu'aucun dépôt n'a eu lieu (ou si alpha est nul), les poids se
+        # réduisent à eta^beta : un échantillonneur statique peut servir
+        return self.echantillonneur.statique and (self.alpha == 0 or not self._depots)
+
+    def calculer_candidats(self, k):
+        n = len(self.distances)
+        k = min(k, n - 1)
+        if self._index is not None:
+            voisins = self._index.k_plus_proches(k)
+            return voisins if self.engine == "python" else np.array(voisins, dtype=np.intp).reshape(n, k)
+        if self.engine == "python":
+            return [heapq.nsmallest(k, (j for j in self.all_indices if j != i), key=self.distances[i].__getitem__)
+                    for i in self.all_indices]
+        candidats = np.empty((n, k), dtype=np.intp)
+        for debut in range(0, n, BLOC):
+            d = np.array(self._distances[debut:debut + BLOC])
+            d[np.arange(len(d)), np.arange(debut, debut + len(d))] = np.inf
+            proches = np.argpartition(d, k - 1, axis=1)[:, :k]
+            ordre = np.argsort(np.take_along_axis(d, proches, axis=1), axis=1, kind="stable")
+            candidats[debut:debut + BLOC] = np.take_along_axis(proches, ordre, axis=1)
+        return candidats
+
+    def chemin_plus_proche_voisin(self, depart=0):
+        # Glouton : toujours la ville non visitée la plus proche, O(n²)
+        # sans index spatial
+        n = len(self.distances)
+        chemin = [depart]
+        if self._index is not None:
+            chemin = self._index.tournee_plus_proche_voisin(depart)
+        elif self.engine == "python":
+            restantes = set(self.all_indices) - {depart}
+            while restantes:
+                ligne = self.distances[chemin[-1]]
+                prochaine = min(restantes, key=ligne.__getitem__)
+                chemin.append(prochaine)
+                restantes.remove(prochaine)
+        else:
+            visitees = np.zeros(n, dtype=bool)
+            visitees[depart] = True
+            for _ in range(n - 1):
+                prochaine = int(np.argmin(np.where(visitees, np.inf, self._distances[chemin[-1]])))
+                chemin.append(prochaine)
+                visitees[prochaine] = True
+        return (chemin, self.calculer_distance_chemin(chemin))
 
     def calculer_distance_chemin(self, chemin):
         L=len(chemin)
@@ -28,25 +474,45 @@ class AntColony:
     
 
     def generer_tous_chemins(self):
-        chemin=[random.randint(0, len(self.distances)-1)]
+        alea.deriver()
+        if self.engine == "numpy":
+            return self.generer_chemin_numpy()
+        chemin=[alea.randint(0, len(self.distances)-1)]
+        visitees = {chemin[0]}
         while len(chemin)<len(self.distances):
-            prochaines_probas = self.calculer_probabilites_mouvement(chemin)
-            prochaine_ville = self.choisir_ville_suivante(prochaines_probas)
+            prochaine_ville = None
+            if self.variant == "acs" and alea.random() < self.q0:
+                prochaine_ville = self.choisir_meilleure_ville(chemin[-1], visitees)
+            if prochaine_ville is None and self.candidats is not None:
+                prochaine_ville = self.choisir_parmi_candidats(chemin[-1], visitees)
+            if prochaine_ville is None and self.tirage_statique():
+                prochaine_ville = self.echantillonneur.choisir_statique(chemin[-1], visitees)
+            if prochaine_ville is None:
+                prochaines_probas = self.calculer_probabilites_mouvement(chemin, visitees)
+                prochaine_ville = self.choisir_ville_suivante(prochaines_probas)
             chemin.append(prochaine_ville)
+            visitees.add(prochaine_ville)
+            if len(chemin) % PAS_ARRET == 0:
+                self.verifier_arret()
+            if self.variant == "acs":
+                self.mise_a_jour_locale(chemin[-2], prochaine_ville)
         
         return (chemin, self.calculer_distance_chemin(chemin))
 
-    def calculer_probabilites_mouvement(self, chemin):
+    def calculer_probabilites_mouvement(self, chemin, visitees=None):
         derniere=chemin[-1]
+        if visitees is None:
+            visitees = chemin
         proba=[]
         for ville in self.all_indices:
-            if ville in chemin:
+            if ville in visitees:
                 proba.append(0)
             else:
-                pheromone= self.pheromones[derniere][ville] ** self.alpha
-                heuristique = (1.0 / self.distances[derniere][ville]) ** self.beta
-                proba.append(pheromone * heuristique)
+                proba.append(self._choix[derniere][ville])
         
+        # Poids bruts si l'échantillonneur se passe de normalisation
+        if not self.echantillonneur.normalise:
+            return proba
         total = sum(proba)
         if total > 0:
             return [p / total for p in proba]
@@ -54,63 +520,736 @@ class AntColony:
             return [0] * len(proba)
         
     def choisir_ville_suivante(self, probabilites):
-        r = random.random()  # nombre aléatoire dans [0,1[
-        cumul = 0.0
-        for i, p in enumerate(probabilites):
-            cumul += p
-            if r <= cumul:
-                return i
-        
-        return len(probabilites) - 1
+        return self.echantillonneur.choisir(probabilites)
             
+    def choisir_meilleure_ville(self, derniere, visitees):
+        # Exploitation (ACS) : argmax de tau^alpha * eta^beta, sans construire
+        # de liste de probabilités ; candidats d'abord s'il y en a
+        if self.engine == "python":
+            choix = self._choix[derniere]
+            if self.candidats is not None:
+                libres = [ville for ville in self.candidats[derniere] if ville not in visitees]
+                if libres:
+                    return max(libres, key=choix.__getitem__)
+            return max((ville for ville in self.all_indices if ville not in visitees), key=choix.__getitem__)
+        if self.candidats is not None:
+            candidats = self.candidats[derniere]
+            libres = candidats[~visitees[candidats]]
+            if len(libres) > 0:
+                return int(libres[np.argmax(self._choix[derniere, libres])])
+        return int(np.argmax(np.where(visitees, -np.inf, self._choix[derniere])))
+
+    def mise_a_jour_locale(self, ville1, ville2):
+        # tau <- (1 - xi) tau + xi tau0, en valeurs brutes
+        self._depots = True
+        if self.engine == "python":
+            avant = self._pheromones[ville1][ville2]
+            brut = (1 - self.xi) * avant + self.xi * self.tau0 / self._echelle
+            self._pheromones[ville1][ville2] = brut
+            self._choix[ville1][ville2] = brut ** self.alpha * self._heuristique[ville1][ville2]
+            if self.symmetric:
+                self.recopier_choix(ville1, ville2)
+            self.compter_ecriture((ville1, ville2), avant, brut)
+            return
+        # Indices scalaires ou tableaux (une arête par fourmi en mode "batch",
+        # dédoublonnées : deux fourmis sur la même arête la mettent à jour une fois)
+        arete = (ville1, ville2)
+        if np.ndim(ville1):
+            ville1, ville2 = self.orienter(arete)
+            arete = np.divmod(np.unique(ville1 * len(self._pheromones) + ville2), len(self._pheromones))
+        avant = self._pheromones[arete]
+        brut = (1 - self.xi) * avant + self.xi * self.tau0 / self._echelle
+        self._pheromones[arete] = brut
+        self._choix[arete] = brut ** self.alpha * self._heuristique[arete]
+        if self.symmetric:
+            self.recopier_choix(*arete)
+        # Mode creux : une arête hors du graphe garde la valeur commune
+        self.compter_ecriture(arete, avant, self._pheromones[arete] if self._creuse else brut)
+
+    def choisir_parmi_candidats(self, derniere, visitees):
+        # Renvoie None quand tous les candidats sont déjà visités : on se
+        # rabat alors sur l'ensemble des villes
+        libres = [ville for ville in self.candidats[derniere] if ville not in visitees]
+        if not libres:
+            return None
+        choix = self._choix[derniere]
+        proba = [choix[ville] for ville in libres]
+        total = sum(proba)
+        if total <= 0:
+            return None
+        if self.echantillonneur.normalise:
+            proba = [p / total for p in proba]
+        return libres[self.choisir_ville_suivante(proba)]
+
+    def generer_chemin_numpy(self):
+        # Même tirages (module random) que le moteur python, mais un masque
+        # booléen des villes visitées remplace le test `ville in chemin`
+        n = len(self._distances)
+        chemin = [alea.randint(0, n-1)]
+        visitees = np.zeros(n, dtype=bool)
+        visitees[chemin[0]] = True
+        while len(chemin) < n:
+            prochaine_ville = None
+            if self.variant == "acs" and alea.random() < self.q0:
+                prochaine_ville = self.choisir_meilleure_ville(chemin[-1], visitees)
+            if prochaine_ville is None and self.candidats is not None:
+                prochaine_ville = self.choisir_parmi_candidats_numpy(chemin[-1], visitees)
+            if prochaine_ville is None and self.tirage_statique():
+                prochaine_ville = self.echantillonneur.choisir_statique(chemin[-1], visitees)
+            if prochaine_ville is None:
+                prochaines_probas = self.calculer_probabilites_numpy(chemin[-1], visitees)
+                prochaine_ville = self.choisir_ville_suivante(prochaines_probas)
+            chemin.append(prochaine_ville)
+            visitees[prochaine_ville] = True
+            if len(chemin) % PAS_ARRET == 0:
+                self.verifier_arret()
+            if self.variant == "acs":
+                self.mise_a_jour_locale(chemin[-2], prochaine_ville)
+
+        etapes = self._distances[chemin[:-1], chemin[1:]]
+        return (chemin, sum(etapes.tolist()))
+
+    def choisir_parmi_candidats_numpy(self, derniere, visitees):
+        candidats = self.candidats[derniere]
+        libres = candidats[~visitees[candidats]]
+        if len(libres) == 0:
+            return None
+        proba = self._choix[derniere, libres]
+        total = np.cumsum(proba)[-1]
+        if total <= 0:
+            return None
+        if self.echantillonneur.normalise:
+            proba = proba / total
+        return int(libres[self.choisir_ville_suivante(proba)])
+
+    def calculer_probabilites_numpy(self, derniere, visitees):
+        proba = self._choix[derniere].copy()
+        proba[visitees] = 0.0
+        if not self.echantillonneur.normalise:
+            return proba
+        # Somme séquentielle, comme sum() sur la liste du moteur python
+        total = np.cumsum(proba)[-1]
+        if total > 0:
+            return proba / total
+        return np.zeros_like(proba)
+
+    def generer_chemins_lot(self):
+        # Toutes les fourmis avancent d'un pas ensemble : une ligne de la
+        # matrice `visitees` (n_ants x n) par fourmi
+        n = len(self._distances)
+        lignes = np.arange(self.n_ants)
+        chemins = np.empty((self.n_ants, n), dtype=np.intp)
+        chemins[:, 0] = self._rng.integers(0, n, size=self.n_ants)
+        visitees = np.zeros((self.n_ants, n), dtype=bool)
+        visitees[lignes, chemins[:, 0]] = True
+        for etape in range(1, n):
+            if etape % PAS_ARRET == 0:
+                self.verifier_arret()
+            courantes = chemins[:, etape - 1]
+            if self.variant == "acs":
+                exploitent = self._rng.random(self.n_ants) < self.q0
+                suivantes = np.empty(self.n_ants, dtype=np.intp)
+                suivantes[exploitent] = self.exploiter_lot(courantes[exploitent], visitees[exploitent])
+                suivantes[~exploitent] = self.explorer_lot(courantes[~exploitent], visitees[~exploitent])
+                self.mise_a_jour_locale(courantes, suivantes)
+            else:
+                suivantes = self.explorer_lot(courantes, visitees)
+            chemins[:, etape] = suivantes
+            visitees[lignes, suivantes] = True
+
+        longueurs = self._distances[chemins[:, :-1], chemins[:, 1:]].sum(axis=1)
+        return [(chemin, float(longueur)) for chemin, longueur in zip(chemins.tolist(), longueurs)]
+
+    def explorer_lot(self, courantes, visitees):
+        if self.candidats is None:
+            return self.tirer_lot(courantes, visitees)
+        lignes = np.arange(len(courantes))
+        candidats = self.candidats[courantes]
+        poids = self._choix[courantes[:, None], candidats]
+        poids[visitees[lignes[:, None], candidats]] = 0.0
+        suivantes = candidats[lignes, self.echantillonneur.tirer_lignes(poids, self._rng)]
+        # Fourmis dont tous les candidats sont visités : ensemble complet
+        repli = ~(poids.sum(axis=1) > 0)
+        if repli.any():
+            suivantes[repli] = self.tirer_lot(courantes[repli], visitees[repli])
+        return suivantes
+
+    def exploiter_lot(self, courantes, visitees):
+        # Version "batch" de choisir_meilleure_ville
+        suivantes = np.argmax(np.where(visitees, -np.inf, self._choix[courantes]), axis=1)
+        if self.candidats is None:
+            return suivantes
+        lignes = np.arange(len(courantes))
+        candidats = self.candidats[courantes]
+        valeurs = np.where(visitees[lignes[:, None], candidats], -np.inf, self._choix[courantes[:, None], candidats])
+        libres = valeurs.max(axis=1) > -np.inf
+        suivantes[libres] = candidats[lignes, np.argmax(valeurs, axis=1)][libres]
+        return suivantes
+
+    def tirer_lot(self, courantes, visitees):
+        poids = self._choix[courantes]
+        poids[visitees] = 0.0
+        bloquees = ~(poids.sum(axis=1) > 0)
+        if bloquees.any():
+            # Plus aucun poids exploitable : tirage uniforme parmi les villes restantes
+            poids[bloquees] = ~visitees[bloquees]
+        return self.echantillonneur.tirer_lignes(poids, self._rng)
+
+    def generer_chemins_paralleles(self):
+        graines = [graine_fourmi(self._graine, self._n_constructions, fourmi) for fourmi in range(self.n_ants)]
+        self._n_constructions += 1
+        if self.workers == 1:
+            return construire_fourmis(self, graines)
+        if self.backend == "threads" and gil_actif():
+            # Avec le GIL, des threads ne feraient qu'ajouter du coût : en série
+            return construire_fourmis(self, graines)
+        if self._pool is None:
+            pool = PoolThreads if self.backend == "threads" else PoolFourmis
+            self._pool = pool(self, self.workers)
+        return self._pool.construire(graines)
+
+    def verifier_arret(self):
+        # Appelée entre deux fourmis et tous les PAS_ARRET pas de construction
+        if self._evenement_arret is not None and self._evenement_arret.is_set():
+            raise IterationAnnulee()
+        if self._echeance is not None and time.perf_counter() > self._echeance:
+            raise IterationAnnulee()
+
+    def fermer(self):
+        # Arrête le pool (et libère la mémoire partagée des processus) ;
+        # dernière sauvegarde des phéromones sur disque
+        if self._pool is not None:
+            self._pool.fermer()
+            self._pool = None
+        self.sauvegarder()
+
+    def sauvegarder(self):
+        """
+        Sauvegarde l'état de la colonie dans son fichier de phéromones
+        (pheromone_file) ; sans effet sinon. Appelée automatiquement toutes
+        les `checkpoint_every` itérations, à la fin de iterate/solve, et
+        après toute réécriture de la matrice entière (réinitialisation MMAS,
+        affectation de `pheromones`). Ces réécritures se font en valeurs
+        brutes sous le facteur déjà sauvegardé ; seul un repli (voir
+        normaliser_pheromones) change ce facteur, via FichierPheromones.replier.
+        """
+        if self._fichier is None:
+            return
+        self._fichier.sauvegarder(self.etat_sauvegarde())
+
+    def etat_sauvegarde(self):
+        return {
+            "n": len(self._pheromones),
+            "variante": self.variant,
+            "echelle": self._echelle,
+            "iterations": self.iterations_faites,
+            "meilleur_chemin": None if self.meilleur_chemin is None else list(map(int, self.meilleur_chemin)),
+            "meilleure_distance": self.meilleure_distance,
+            "iterations_sans_amelioration": self.iterations_sans_amelioration,
+            "reinitialisations": self.n_reinitialisations,
+        }
+
+    def reprendre(self, etat):
+        # État lu dans le fichier des phéromones (voir sauvegarder)
+        if etat["n"] != len(self._pheromones) or etat["variante"] != self.variant:
+            raise ValueError(f"{self._fichier.chemin} : état d'une colonie \"{etat['variante']}\" à {etat['n']} villes, "
+                             f"attendu \"{self.variant}\" à {len(self._pheromones)}")
+        self._echelle = etat["echelle"]
+        self.iterations_faites = etat["iterations"]
+        self.meilleur_chemin = etat["meilleur_chemin"]
+        self.meilleure_distance = etat["meilleure_distance"]
+        self.iterations_sans_amelioration = etat["iterations_sans_amelioration"]
+        self.n_reinitialisations = etat["reinitialisations"]
+        self._depots = self.iterations_faites > 0
+        self.recalculer_statistiques()
+
+    def ameliorer_chemins(self, tous_chemins):
+        if self._voisins_recherche is None:
+            voisins = self.candidats if self.candidats is not None else self.calculer_candidats(N_VOISINS_RECHERCHE)
+            self._voisins_recherche = [list(map(int, ligne)) for ligne in voisins]
+        tous_chemins = sorted(tous_chemins, key=lambda x: x[1])
+        k = len(tous_chemins) if self.n_local_search is None else self.n_local_search
+        for i, (chemin, _) in enumerate(tous_chemins[:k]):
+            self.verifier_arret()
+            chemin = ameliorer(chemin, self.distances, self._voisins_recherche, self.local_search)
+            tous_chemins[i] = (chemin, self.calculer_distance_chemin(chemin))
+        return tous_chemins
+
     def deposer_pheromones(self, tous_chemins):
-        L=sorted(tous_chemins)
+        self.proteger_instantane()
+        if self.variant == "acs":
+            # Mise à jour globale ACS : seul le meilleur chemin depuis le début
+            self.renforcer_chemin(self.meilleur_chemin, self.meilleure_distance, 1 - self.decay)
+            return
+        if self.variant == "mmas":
+            if self.mmas_deposit == "global":
+                self.deposer_chemin(self.meilleur_chemin, self.meilleure_distance)
+            else:
+                self.deposer_chemin(*min(tous_chemins, key=lambda x: x[1]))
+            return
+        L=sorted(tous_chemins, key=lambda x: x[1])
         for chemin, distance in L[:self.n_best]:
-            for i in range(len(chemin) - 1):
-                ville1, ville2 = chemin[i], chemin[i+1]
-                self.pheromones[ville1][ville2] += 1.0 / distance
+            self.deposer_chemin(chemin, distance)
+
+    def deposer_chemin(self, chemin, distance):
+        # Dépôt divisé par le facteur global pour rester en valeurs brutes
+        self._depots = True
+        depot = 1.0 / distance / self._echelle
+        if self.engine != "python":
+            aretes = (chemin[:-1], chemin[1:])
+            if self._creuse:
+                # Seules les arêtes du graphe reçoivent le dépôt
+                avant = self._pheromones[aretes]
+                self._pheromones[aretes] = avant + depot
+                self._choix[aretes] = self._pheromones[aretes] ** self.alpha * self._heuristique[aretes]
+                self.compter_ecriture(aretes, avant, self._pheromones[aretes])
+                return
+            if self.symmetric:
+                # Les arêtes d'un chemin sont distinctes, même sans orientation
+                self._pheromones[aretes] += depot
+            else:
+                np.add.at(self._pheromones, aretes, depot)
+            self._choix[aretes] = self._pheromones[aretes] ** self.alpha * self._heuristique[aretes]
+            if self.symmetric:
+                self.recopier_choix(*aretes)
+            self._somme_brute += depot * (len(chemin) - 1) * (2 if self.symmetric else 1)
+            if self._max_brut is not None:
+                self._max_brut = max(self._max_brut, float(self._pheromones[aretes].max()))
+            if self._suivi is not None:
+                self._suivi.ecrire(self.orienter(aretes), self._pheromones[aretes])
+            return
+        maximum = 0.0
+        for i in range(len(chemin) - 1):
+            ville1, ville2 = chemin[i], chemin[i+1]
+            self._pheromones[ville1][ville2] += depot
+            self._choix[ville1][ville2] = self._pheromones[ville1][ville2] ** self.alpha * self._heuristique[ville1][ville2]
+            if self.symmetric:
+                self.recopier_choix(ville1, ville2)
+            maximum = max(maximum, self._pheromones[ville1][ville2])
+            if self._suivi is not None:
+                self._suivi.ecrire_arete(self.orienter((ville1, ville2)), self._pheromones[ville1][ville2])
+        self._somme_brute += depot * (len(chemin) - 1) * (2 if self.symmetric else 1)
+        if self._max_brut is not None:
+            self._max_brut = max(self._max_brut, maximum)
     
+    def renforcer_chemin(self, chemin, distance, rho):
+        # tau <- (1 - rho) tau + rho / L sur les arêtes du chemin seulement
+        self._depots = True
+        depot = rho / distance / self._echelle
+        if self.engine != "python":
+            aretes = (chemin[:-1], chemin[1:])
+            avant = self._pheromones[aretes]
+            self._pheromones[aretes] = (1 - rho) * avant + depot
+            self._choix[aretes] = self._pheromones[aretes] ** self.alpha * self._heuristique[aretes]
+            if self.symmetric:
+                self.recopier_choix(*aretes)
+            self.compter_ecriture(aretes, avant, self._pheromones[aretes])
+            return
+        for i in range(len(chemin) - 1):
+            ville1, ville2 = chemin[i], chemin[i+1]
+            avant = self._pheromones[ville1][ville2]
+            self._pheromones[ville1][ville2] = (1 - rho) * avant + depot
+            self._choix[ville1][ville2] = self._pheromones[ville1][ville2] ** self.alpha * self._heuristique[ville1][ville2]
+            if self.symmetric:
+                self.recopier_choix(ville1, ville2)
+            self.compter_ecriture((ville1, ville2), avant, self._pheromones[ville1][ville2])
+
+    def borner_pheromones(self):
+        # Bornes MMAS (Stützle & Hoos) : tau_max = 1 / (rho L*), et tau_min tel
+        # qu'une fourmi convergée refasse L* avec la probabilité p_best
+        n = len(self.distances)
+        self.tau_max = 1.0 / ((1 - self.decay) * self.meilleure_distance)
+        racine = self.p_best ** (1.0 / n)
+        self.tau_min = min(self.tau_max * (1 - racine) / (max(n / 2 - 1, 1) * racine), self.tau_max)
+        bas, haut = self.tau_min / self._echelle, self.tau_max / self._echelle
+        if self.engine != "python" and (self.symmetric or self._creuse):
+            # Bornage direct des valeurs stockées : une case par arête (mode
+            # symétrique), ou par arête du graphe (mode creux)
+            valeurs = self._pheromones.valeurs
+            hors = np.flatnonzero((valeurs < bas) | (valeurs > haut))
+            if len(hors):
+                avant = valeurs[hors]
+                np.clip(valeurs, bas, haut, out=valeurs)
+                aretes = self._pheromones.paires(hors)
+                self._choix[aretes] = valeurs[hors] ** self.alpha * self._heuristique[aretes]
+                if self.symmetric:
+                    self.recopier_choix(*aretes)
+                if self._suivi is not None and len(avant) > self._suivi.taille:
+                    self._suivi.sale = True
+                self.compter_ecriture(aretes, avant, valeurs[hors])
+            if self._creuse and not bas <= self._pheromones.defaut <= haut:
+                # Valeur commune des arêtes hors du graphe
+                self._pheromones.defaut = min(max(self._pheromones.defaut, bas), haut)
+                self.calculer_choix()
+                self.recalculer_statistiques()
+            return
+        if self.engine != "python":
+            hors = (self._pheromones < bas) | (self._pheromones > haut)
+            if hors.any():
+                avant = self._pheromones[hors]
+                np.clip(self._pheromones, bas, haut, out=self._pheromones)
+                self._choix[hors] = self._pheromones[hors] ** self.alpha * self._heuristique[hors]
+                if self._suivi is not None and len(avant) > self._suivi.taille:
+                    # Trop d'arêtes bornées : un parcours complet coûtera moins
+                    self._suivi.sale = True
+                self.compter_ecriture(np.nonzero(hors) if self._suivi is not None else None, avant, self._pheromones[hors])
+            return
+        for i, (ligne_t, ligne_c, ligne_h) in enumerate(zip(self._pheromones, self._choix, self._heuristique)):
+            for j, t in enumerate(ligne_t):
+                if self.symmetric and j <= i:
+                    continue
+                if t < bas or t > haut:
+                    ligne_t[j] = min(max(t, bas), haut)
+                    ligne_c[j] = ligne_t[j] ** self.alpha * ligne_h[j]
+                    if self.symmetric:
+                        self.recopier_choix(i, j)
+                    self.compter_ecriture((i, j), t, ligne_t[j])
+
+    def reinitialiser_pheromones(self, valeur):
+        # Toutes les pistes à `valeur` : matrice brute à 1, facteur global à
+        # valeur. Sur disque, le facteur sauvegardé est gardé
+        self.proteger_instantane()
+        if self._fichier is not None:
+            self._pheromones.fill(valeur / self._echelle)
+        else:
+            self._pheromones.fill(1.0)
+            self._echelle = valeur
+        self.calculer_choix()
+        self.recalculer_statistiques()
+        if self._suivi is not None:
+            self._suivi.sale = True
+        self.iterations_sans_amelioration = 0
+        self.n_reinitialisations += 1
+        self.sauvegarder()
+
+    def compter_ecriture(self, aretes, avant, apres):
+        # Valeurs brutes (scalaires ou tableaux) avant/après une écriture sur
+        # place des arêtes `aretes` = (i, j) ; en mode symétrique, chaque
+        # case stockée compte pour (i, j) et (j, i)
+        if self._suivi is not None:
+            self._suivi.ecrire(self.orienter(aretes), apres)
+        poids = 2 if self.symmetric else 1
+        if self.engine == "python":
+            self._somme_brute += poids * (apres - avant)
+            if self._max_brut is not None:
+                self._max_brut = None if avant >= self._max_brut > apres else max(self._max_brut, apres)
+            return
+        self._somme_brute += poids * float(np.sum(apres) - np.sum(avant))
+        if self._max_brut is not None and len(np.atleast_1d(avant)):
+            if np.any((avant >= self._max_brut) & (apres < self._max_brut)):
+                self._max_brut = None
+            else:
+                self._max_brut = max(self._max_brut, float(np.max(apres)))
+
+    def recalculer_statistiques(self):
+        self._somme_brute = float(self._pheromones.sum())
+        self._max_brut = float(self._pheromones.max())
+
+    def statistiques(self, maximum=True):
+        """
+        Agrégats courants des phéromones (valeurs réelles) et des longueurs,
+        en O(1). Seul le maximum, quand la plus forte piste vient d'être
+        affaiblie (mises à jour locales ACS, bornes MMAS), se recalcule en
+        parcourant la matrice ; avec maximum=False il vaut alors None.
+        """
+        if self._max_brut is None and maximum:
+            self._max_brut = float(self._pheromones.max())
+        n = len(self.distances)
+        total = self._somme_brute * self._echelle
+        max_reel = None if self._max_brut is None else self._max_brut * self._echelle
+        return Statistiques(self.iterations_faites - 1, total, total / (n * n), max_reel,
+                            self.distance_iteration, self.meilleure_distance)
+
+    def facteur_branchement(self, lambda_=LAMBDA_BRANCHEMENT):
+        """
+        Facteur de lambda-branchement de chaque ville : nombre d'arêtes
+        sortantes dont la piste dépasse min + lambda * (max - min) de sa
+        ligne. Proche de 1 quand la colonie a convergé. Indépendant du
+        facteur global, mais en O(n^2) : calculé à la demande seulement.
+        """
+        n = len(self.distances)
+        if self.engine != "python":
+            pistes = np.where(np.eye(n, dtype=bool), np.nan, self._pheromones)
+            bas, haut = np.nanmin(pistes, axis=1), np.nanmax(pistes, axis=1)
+            return (pistes >= (bas + lambda_ * (haut - bas))[:, None]).sum(axis=1).tolist()
+        facteurs = []
+        for i, ligne in enumerate(self._pheromones):
+            pistes = [t for j, t in enumerate(ligne) if j != i]
+            seuil = min(pistes) + lambda_ * (max(pistes) - min(pistes))
+            facteurs.append(sum(1 for t in pistes if t >= seuil))
+        return facteurs
+
     def evaporer_pheromones(self):
-        n = len(self.pheromones)
-        for i in range(n):
-            for j in range(n):
-                self.pheromones[i][j] *= self.decay
+        if self.variant == "acs":
+            # En ACS l'évaporation fait partie des mises à jour locale et globale
+            return
+        # O(1) : seul le facteur global diminue
+        self._echelle *= self.decay
+        if self._echelle < ECHELLE_MIN:
+            self.normaliser_pheromones()
     
+    def publier_pheromones(self):
+        # Fin d'itération : le tampon courant devient lisible, sans copie
+        with self._verrou:
+            self._publie = Instantane(self._pheromones, self._echelle, self.iterations_faites - 1,
+                                      self.statistiques(maximum=False), self._verrou if self._fichier is not None else None)
+
+    def instantane(self):
+        """
+        Phéromones publiées à la fin de la dernière itération, en lecture
+        seule (None avant la première). Sans risque depuis un autre thread :
+        la colonie ne modifie plus le tampon d'un instantané remis.
+        """
+        with self._verrou:
+            if self._publie is not None:
+                self._pris = self._publie
+                self._lecteurs.add(self._pris)
+            return self._pris
+
+    def proteger_instantane(self):
+        # Avant toute écriture sur place dans _pheromones. Publication non
+        # remise : simplement retirée. Remise : la colonie passe sur son
+        # second tampon (réutilisé si plus aucun lecteur ne le tient), qu'il
+        # faut alors seulement recopier
+        with self._verrou:
+            publie, self._publie = self._publie, None
+            if publie is None or publie is not self._pris or publie._tampon is not self._pheromones:
+                return
+            tampon, reserve = self._pheromones, self._reserve
+            libre = reserve is not None and not any(lecteur._tampon is reserve for lecteur in self._lecteurs)
+            if self._fichier is not None:
+                # Le fichier reste le tampon de la colonie : c'est l'instantané
+                # remis qui passe sur une copie (lue sous ce même verrou)
+                if libre:
+                    np.copyto(reserve, tampon)
+                elif reserve is None:
+                    reserve = self._fichier.tampon("instantane", tampon.shape, tampon.dtype)
+                    np.copyto(reserve, tampon)
+                else:
+                    # Un lecteur tient encore la copie précédente
+                    reserve = np.array(tampon)
+                publie._tampon = self._reserve = reserve
+                return
+            if self.engine == "python" or self.symmetric or self._creuse:
+                # MatriceCompacte, MatriceCondensee ou MatriceCreuse : un seul
+                # tampon de valeurs à recopier (et la valeur commune)
+                if libre:
+                    reserve.valeurs[:] = tampon.valeurs
+                    if self._creuse:
+                        reserve.defaut = tampon.defaut
+                else:
+                    reserve = tampon.copy()
+            elif libre:
+                np.copyto(reserve, tampon)
+            else:
+                reserve = tampon.copy()
+            self._pheromones, self._reserve = reserve, tampon
+
     def executer_iteration(self):
-        
+        self.proteger_instantane()
+        self.verifier_choix()
+
         # Générer les chemins pour toutes les fourmis
-        tous_les_chemins = []
-        for _ in range(self.n_ants):
-            tous_les_chemins.append(self.generer_tous_chemins())
+        debut = time.perf_counter()
+        if self.engine == "batch":
+            tous_les_chemins = self.generer_chemins_lot()
+        elif self.workers is not None:
+            tous_les_chemins = self.generer_chemins_paralleles()
+        else:
+            tous_les_chemins = []
+            alea.definir(self._aleatoire)
+            try:
+                for _ in range(self.n_ants):
+                    self.verifier_arret()
+                    tous_les_chemins.append(self.generer_tous_chemins())
+            finally:
+                alea.definir(random)
+        self.durees["construction"] += time.perf_counter() - debut
+
+        # Améliorer les chemins par recherche locale
+        if self.local_search is not None:
+            debut = time.perf_counter()
+            tous_les_chemins = self.ameliorer_chemins(tous_les_chemins)
+            self.durees["recherche_locale"] += time.perf_counter() - debut
         
         # Trouver le meilleur chemin de cette itération
         meilleur_chemin_iteration = min(tous_les_chemins, key=lambda x: x[1])
+        self.distance_iteration = meilleur_chemin_iteration[1]
         
         # Mettre à jour le meilleur chemin global
         if meilleur_chemin_iteration[1] < self.meilleure_distance:
             self.meilleur_chemin = meilleur_chemin_iteration[0]
             self.meilleure_distance = meilleur_chemin_iteration[1]
+            self.iterations_sans_amelioration = 0
+        else:
+            self.iterations_sans_amelioration += 1
         
         # Déposer et évaporer les phéromones
         self.deposer_pheromones(tous_les_chemins)
         self.evaporer_pheromones()
+        if self.variant == "mmas":
+            self.borner_pheromones()
+            if self.iterations_sans_amelioration >= self.stagnation:
+                self.reinitialiser_pheromones(self.tau_max)
         
+        self.iterations_faites += 1
+        self.publier_pheromones()
+        if self.iterations_faites % self.checkpoint_every == 0:
+            self.sauvegarder()
+        self.notifier_abonnes()
         return meilleur_chemin_iteration
 
+    def abonner(self, callback, niveau="meilleur", k=100, intervalle=1):
+        """
+        Appelle callback(iteration, donnees) à la fin de chaque itération,
+        avec le meilleur chemin ("meilleur"), les k plus fortes arêtes en
+        tableaux (i, j, valeurs) ("aretes") ou un instantané complet toutes
+        les `intervalle` itérations ("matrice"). Voir abonnements.Abonnement.
+        """
+        abonnement = Abonnement(callback, niveau, k, intervalle)
+        if niveau == "aretes" and (self._suivi is None or self._suivi.taille < MARGE * k):
+            self._suivi = SuiviAretes(MARGE * k)
+        self._abonnements.append(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement):
+        self._abonnements.remove(abonnement)
+        if not any(a.niveau == "aretes" for a in self._abonnements):
+            self._suivi = None
+
+    def aretes_fortes(self, k):
+        """Les k plus fortes pistes, par valeur décroissante, en tableaux (i, j, valeurs)."""
+        if self._suivi is None or self._suivi.taille < k:
+            self._suivi = SuiviAretes(MARGE * k)
+        return tableaux_aretes(self._suivi.meilleures(k, self._pheromones), self._echelle)
+
+    def notifier_abonnes(self):
+        iteration = self.iterations_faites - 1
+        for abonnement in self._abonnements:
+            if abonnement.niveau == "meilleur":
+                abonnement.callback(iteration, (self.meilleur_chemin, self.meilleure_distance))
+            elif abonnement.niveau == "aretes":
+                abonnement.callback(iteration, self.aretes_fortes(abonnement.k))
+            elif iteration % abonnement.intervalle == 0:
+                abonnement.callback(iteration, self.instantane())
+
+    def iterate(self, evenement_arret=None, echeance=None):
+        """
+        Générateur : exécute au plus n_iterations itérations et produit un
+        Iteration après chacune, sans pause ni copie des phéromones.
+
+        Le consommateur avance à son rythme et peut s'arrêter à tout moment
+        (break ou close()). Un arrêt via `evenement_arret`, ou le passage de
+        l'`echeance` (instant time.perf_counter()), est surveillé jusque dans
+        la construction : l'itération en cours est alors abandonnée avant
+        tout dépôt (sous "acs", les mises à jour locales déjà faites
+        restent), et `statut` passe à "annule".
+        """
+        self._evenement_arret = evenement_arret
+        self._echeance = echeance
+        self.statut = "en cours"
+        annulee = False
+        try:
+            for numero in range(self.n_iterations):
+                if evenement_arret is not None and evenement_arret.is_set():
+                    annulee = True
+                    break
+                if echeance is not None and time.perf_counter() > echeance:
+                    annulee = True
+                    break
+                debut = time.perf_counter()
+                try:
+                    chemin, distance = self.executer_iteration()
+                except IterationAnnulee:
+                    annulee = True
+                    break
+                yield Iteration(numero, chemin, distance, self.meilleur_chemin, self.meilleure_distance,
+                                time.perf_counter() - debut)
+        finally:
+            self._evenement_arret = self._echeance = None
+            self.fermer()
+            self.statut = "annule" if annulee else "termine"
+
+    async def aiterate(self, evenement_arret=None):
+        """
+        Version asynchrone d'iterate : chaque itération tourne dans un
+        thread. Annuler la tâche consommatrice abandonne l'itération en
+        cours, comme un arrêt via `evenement_arret`.
+        """
+        arret = threading.Event()
+        iterations = self.iterate(ArretCombine(evenement_arret, arret))
+        fin = object()
+        en_cours = None
+        try:
+            while True:
+                # Protégé de l'annulation : le thread, lui, ne s'interrompt pas
+                en_cours = asyncio.ensure_future(asyncio.to_thread(next, iterations, fin))
+                resultat = await asyncio.shield(en_cours)
+                if resultat is fin:
+                    break
+                yield resultat
+        finally:
+            # Le générateur ne se ferme qu'une fois rendu par son thread, que
+            # l'arrêt libère au prochain verifier_arret
+            arret.set()
+            if en_cours is not None and not en_cours.done():
+                await asyncio.wait({en_cours})
+                if not en_cours.cancelled():
+                    en_cours.exception()
+            iterations.close()
+
+    def solve(self, time_limit=None, target=None, max_stagnation=None, callback_maj=None, evenement_arret=None):
+        """
+        Exécute au plus n_iterations itérations et renvoie une Solution.
+
+        S'arrête avant d'entamer une itération qui dépasserait `time_limit`
+        secondes (d'après la durée moyenne des précédentes), et abandonne
+        celle en cours si l'échéance tombe pendant sa construction : le
+        meilleur chemin déjà trouvé est rendu (celui du plus proche voisin
+        si aucune itération n'a abouti). S'arrête aussi dès qu'un chemin de
+        longueur <= `target` est trouvé, après `max_stagnation` itérations
+        sans amélioration ou quand `evenement_arret` est levé (voir
+        iterate). `callback_maj` reçoit,
+        comme pour run, l'itération, son meilleur chemin et un instantané
+        des phéromones (voir instantane).
+        """
+        debut = time.perf_counter()
+        echeance = None if time_limit is None else debut + time_limit
+        durees_initiales = dict(self.durees)
+        iteration, raison = 0, None
+        iterations = self.iterate(evenement_arret, echeance)
+        try:
+            for resultat in iterations:
+                iteration += 1
+                if callback_maj is not None:
+                    callback_maj(resultat.numero, (resultat.chemin, resultat.distance), self.instantane())
+
+                if target is not None and self.meilleure_distance <= target:
+                    raison = "cible"
+                    break
+                if max_stagnation is not None and self.iterations_sans_amelioration >= max_stagnation:
+                    raison = "stagnation"
+                    break
+                maintenant = time.perf_counter()
+                restantes = iteration < self.n_iterations
+                if echeance is not None and restantes and maintenant + (maintenant - debut) / iteration > echeance:
+                    raison = "temps"
+                    break
+        finally:
+            iterations.close()
+        if raison is None and self.statut == "annule":
+            # Annulée par l'événement, sinon par l'échéance
+            raison = "arret" if evenement_arret is not None and evenement_arret.is_set() else "temps"
+        elif raison is None:
+            raison = "iterations"
+        if raison == "temps" and self.meilleur_chemin is None:
+            self.meilleur_chemin, self.meilleure_distance = self.chemin_plus_proche_voisin()
+        durees = {etape: duree - durees_initiales[etape] for etape, duree in self.durees.items()}
+        return Solution(self.meilleur_chemin, self.meilleure_distance, raison, iteration,
+                        time.perf_counter() - debut, durees)
+
     def run(self, callback_maj, evenement_arret):
-        
-        for iteration in range(self.n_iterations):
-            # Vérifier si l'arrêt a été demandé
-            if evenement_arret.is_set():
-                break
-            
-            # Exécuter une itération
-            chemin_courant, distance_courante = self.executer_iteration()
-            
-            # Appeler le callback de mise à jour
-            callback_maj(iteration,(chemin_courant, distance_courante),self.pheromones)
-            
-            # Petite pause pour permettre la mise à jour de l'interface
-            time.sleep(0.1)
+        # Aucune pause ici : le rythme d'affichage est l'affaire de l'interface
+        return self.solve(callback_maj=callback_maj, evenement_arret=evenement_arret)
 
 #commentaire
@@ -1,6 +1,9 @@
 import random
-import time
 import threading
+from collections import namedtuple
+
+# Résultat d'une itération, produit par AntColony.iterate
+Iteration = namedtuple("Iteration", "numero chemin distance meilleure_distance")
 
 class AntColony:
     def __init__(self, distances, n_fourmis, n_meilleurs, n_iterations, decroissance, alpha : float=1, beta : float =2):
@@ -28,26 +31,25 @@ class AntColony:
         self.meilleur_chemin = None
         self.meilleure_distance = float('inf')
 
-    def run(self, callback_maj, evenement_arret):
+    def iterate(self, evenement_arret=None):
         """
-        Exécute l'algorithme d'optimisation par colonie de fourmis.
+        Exécute l'algorithme pas à pas, sans pause : le consommateur avance
+        à son rythme et peut s'arrêter à tout moment.
 
         Paramètres
         ----------
-        callback_maj : callable
-            Une fonction de callback à appeler après chaque itération.
-            La fonction doit prendre trois paramètres : l'itération actuelle,
-            le meilleur chemin trouvé jusqu'à présent, et la matrice des phéromones.
-        evenement_arret : threading.Event
+        evenement_arret : threading.Event, optionnel
             Un événement à définir pour arrêter l'algorithme.
 
         Retourne
         -------
-        None
+        generator of Iteration
+            Un résultat par itération : son numéro, son meilleur chemin et sa
+            longueur, et la meilleure distance trouvée jusqu'à présent.
         """
         for iteration in range(self.n_iterations):
             # Vérifier si l'arrêt a été demandé
-            if evenement_arret.is_set():
+            if evenement_arret is not None and evenement_arret.is_set():
                 break
             
             # Générer tous les chemins
@@ -62,10 +64,29 @@ class AntColony:
             # Décroissance des phéromones
             self.pheromones = [[p * self.decroissance for p in ligne] for ligne in self.pheromones]
 
+            yield Iteration(iteration, self.meilleur_chemin[0], self.meilleur_chemin[1], self.meilleure_distance)
+
+    def run(self, callback_maj, evenement_arret):
+        """
+        Exécute l'algorithme d'optimisation par colonie de fourmis.
+
+        Paramètres
+        ----------
+        callback_maj : callable
+            Une fonction de callback à appeler après chaque itération.
+            La fonction doit prendre trois paramètres : l'itération actuelle,
+            le meilleur chemin trouvé jusqu'à présent, et la matrice des phéromones.
+            C'est à elle de rythmer l'affichage : la colonie ne fait aucune pause.
+        evenement_arret : threading.Event
+            Un événement à définir pour arrêter l'algorithme.
+
+        Retourne
+        -------
+        None
+        """
+        for resultat in self.iterate(evenement_arret):
             # Appeler le callback de mise à jour
-            callback_maj(iteration, self.meilleur_chemin, self.pheromones)
-            # Pause pour permettre la mise à jour de l'interface utilisateur
-            time.sleep(0.2*len(self.distances)/10)
+            callback_maj(resultat.numero, self.meilleur_chemin, self.pheromones)
 
     def calculer_distance_chemin(self, chemin):
         """
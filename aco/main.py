@@ -179,6 +179,8 @@ def main(page: ft.Page):
         iteration = iter_num
         best_path = current_best_path[0] if current_best_path else []
         pheromones = current_pheromones
+        # La colonie ne fait plus de pause : on rythme l'affichage ici
+        time.sleep(0.2 * len(nodes) / 10)
         # Fonction pour mettre à jour l'UI dans le thread principal
         async def update_ui():
             iteration_text.value = f"Itération: {iteration}"
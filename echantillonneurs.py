@@ -0,0 +1,203 @@
+import random
+import math
+import bisect
+import itertools
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les tirages sur listes restent possibles
+    np = None
+
+
+class FluxAleatoire(threading.local):
+    """
+    Source des tirages de la construction, propre à chaque thread.
+
+    Par défaut c'est le module `random` lui-même, si bien que random.seed()
+    suffit à rendre un calcul reproductible ; une construction parallèle y
+    installe le générateur de la fourmi en cours. Le générateur NumPy est
+    dérivé du flux à chaque nouvelle fourmi (`deriver`), et suit donc un
+    random.seed() fait entre deux constructions.
+    """
+
+    def __init__(self):
+        self.definir(random)
+
+    def definir(self, generateur):
+        self.generateur = generateur
+        self._numpy = None
+
+    def deriver(self):
+        # Début d'un chemin : le prochain générateur NumPy repartira du flux courant
+        self._numpy = None
+
+    def numpy(self):
+        # Générateur NumPy dérivé du flux courant, créé au premier besoin
+        if self._numpy is None:
+            self._numpy = np.random.default_rng(self.generateur.getrandbits(64))
+        return self._numpy
+
+    def random(self):
+        return self.generateur.random()
+
+    def randint(self, a, b):
+        return self.generateur.randint(a, b)
+
+    def expovariate(self, lambd):
+        return self.generateur.expovariate(lambd)
+
+
+alea = FluxAleatoire()
+
+
+class Echantillonneur:
+    """
+    Choisit la prochaine ville d'une fourmi à partir d'une ligne de poids.
+
+    `choisir` reçoit une ligne (liste ou tableau NumPy) et renvoie un indice ;
+    `tirer_lignes` fait un tirage par ligne d'un tableau 2D (moteur "batch").
+    Quand `normalise` est vrai, la colonie divise les poids par leur somme
+    avant l'appel ; sinon elle transmet les poids bruts.
+    """
+    normalise = False
+    statique = False
+
+    def choisir(self, poids):
+        raise NotImplementedError
+
+    def tirer_lignes(self, poids, rng):
+        # Une ligne nulle renvoie une colonne quelconque, à l'appelant de la traiter
+        cumul = np.cumsum(poids, axis=1)
+        total = cumul[:, -1]
+        r = np.minimum(rng.random(len(poids)) * total, np.nextafter(total, 0))
+        return np.minimum((cumul <= r[:, None]).sum(axis=1), poids.shape[1] - 1)
+
+
+class EchantillonneurCumul(Echantillonneur):
+    """Parcours linéaire de la somme cumulée des probabilités normalisées : O(n)."""
+    normalise = True
+
+    def choisir(self, probabilites):
+        r = alea.random()  # nombre aléatoire dans [0,1[
+        if np is not None and isinstance(probabilites, np.ndarray):
+            # Premier indice dont la somme cumulée atteint r, comme la boucle ci-dessous
+            i = int(np.searchsorted(np.cumsum(probabilites), r, side="left"))
+            return min(i, len(probabilites) - 1)
+        cumul = 0.0
+        for i, p in enumerate(probabilites):
+            cumul += p
+            if r <= cumul:
+                return i
+
+        return len(probabilites) - 1
+
+
+class EchantillonneurDichotomie(Echantillonneur):
+    """
+    Somme cumulée des poids bruts puis recherche dichotomique : pas de passe
+    de normalisation, et la recherche elle-même est en O(log n).
+    """
+
+    def choisir(self, poids):
+        if np is not None and isinstance(poids, np.ndarray):
+            cumul = np.cumsum(poids)
+            i = int(np.searchsorted(cumul, alea.random() * cumul[-1], side="right"))
+        else:
+            cumul = list(itertools.accumulate(poids))
+            i = bisect.bisect_right(cumul, alea.random() * cumul[-1])
+        return min(i, len(poids) - 1)
+
+
+class EchantillonneurGumbel(Echantillonneur):
+    """
+    Astuce Gumbel-max : argmax(log w + G) suit la loi proportionnelle aux
+    poids. Aucun cumul, et un seul argmax par ligne en mode "batch".
+    """
+
+    def choisir(self, poids):
+        if np is not None and isinstance(poids, np.ndarray):
+            return int(self.tirer_lignes(poids[None, :], alea.numpy())[0])
+        # Forme équivalente sans logarithme : argmin E/w avec E ~ Exp(1)
+        meilleur, meilleure_cle = len(poids) - 1, math.inf
+        for i, p in enumerate(poids):
+            if p > 0:
+                cle = alea.expovariate(1.0) / p
+                if cle < meilleure_cle:
+                    meilleur, meilleure_cle = i, cle
+        return meilleur
+
+    def tirer_lignes(self, poids, rng):
+        with np.errstate(divide="ignore"):
+            cles = np.log(poids)
+        return np.argmax(cles + rng.gumbel(size=poids.shape), axis=1)
+
+
+class EchantillonneurAlias(EchantillonneurDichotomie):
+    """
+    Tables d'alias (méthode de Vose) sur les lignes statiques eta^beta :
+    tirage en O(1), les villes déjà visitées étant rejetées puis retirées.
+
+    Ne sert que lorsque les poids se réduisent à l'heuristique (alpha nul ou
+    phéromones encore uniformes) ; sinon les tirages passent par la
+    dichotomie. Les tables sont construites à la demande, ligne par ligne.
+    """
+    statique = True
+
+    def __init__(self, essais=8):
+        self.essais = essais
+        self._tables = {}
+        self._heuristique = None
+
+    def preparer(self, heuristique):
+        self._heuristique = heuristique
+        self._tables = {}
+
+    def choisir_statique(self, ville, visitees):
+        # None après `essais` rejets : la colonie repasse par le tirage complet
+        if ville not in self._tables:
+            self._tables[ville] = self.construire_table(self._heuristique[ville])
+        probas, alias = self._tables[ville]
+        if isinstance(visitees, (set, frozenset)):
+            est_visitee = visitees.__contains__
+        else:
+            est_visitee = visitees.__getitem__
+        n = len(probas)
+        for _ in range(self.essais):
+            k = int(alea.random() * n)
+            j = k if alea.random() < probas[k] else alias[k]
+            if not est_visitee(j):
+                return j
+        return None
+
+    @staticmethod
+    def construire_table(poids):
+        poids = [float(p) for p in poids]
+        n = len(poids)
+        total = sum(poids)
+        echelles = [p * n / total for p in poids]
+        probas, alias = [1.0] * n, list(range(n))
+        petits = [i for i, p in enumerate(echelles) if p < 1.0]
+        grands = [i for i, p in enumerate(echelles) if p >= 1.0]
+        while petits and grands:
+            petit, grand = petits.pop(), grands.pop()
+            probas[petit], alias[petit] = echelles[petit], grand
+            echelles[grand] -= 1.0 - echelles[petit]
+            (petits if echelles[grand] < 1.0 else grands).append(grand)
+        return probas, alias
+
+
+ECHANTILLONNEURS = {
+    "cumul": EchantillonneurCumul,
+    "dichotomie": EchantillonneurDichotomie,
+    "gumbel": EchantillonneurGumbel,
+    "alias": EchantillonneurAlias,
+}
+
+
+def creer_echantillonneur(sampler):
+    if isinstance(sampler, Echantillonneur):
+        return sampler
+    if sampler not in ECHANTILLONNEURS:
+        raise ValueError(f"Échantillonneur inconnu : {sampler!r} (attendu : {', '.join(ECHANTILLONNEURS)})")
+    return ECHANTILLONNEURS[sampler]()
@@ -0,0 +1,98 @@
+import os
+import json
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les matrices sur disque en dépendent
+    np = None
+
+
+def ouvrir_matrice(chemin, forme, dtype="float64", mode="w+"):
+    """
+    Matrice `forme` dans un fichier .npy ouvert en numpy.memmap : seules les
+    pages lues ou écrites passent en mémoire, via le cache du système. Le
+    fichier se relit avec np.load(chemin, mmap_mode="r").
+    """
+    if mode == "w+":
+        return np.lib.format.open_memmap(chemin, mode="w+", dtype=dtype, shape=forme)
+    matrice = np.load(chemin, mmap_mode=mode)
+    if matrice.shape != tuple(forme):
+        raise ValueError(f"{chemin} : matrice {matrice.shape}, attendu {tuple(forme)}")
+    return matrice
+
+
+def est_fichier(tableau):
+    # Tableau projeté depuis un fichier nommé, que d'autres processus peuvent rouvrir
+    return np is not None and isinstance(tableau, np.memmap) and tableau.filename is not None
+
+
+class FichierPheromones:
+    """
+    Phéromones brutes d'une colonie dans un fichier .npy projeté en
+    mémoire (`chemin`), doublé d'un fichier d'état JSON (`chemin` + ".json")
+    : facteur global, itérations faites, meilleur chemin.
+
+    La colonie écrit directement dans le fichier ; `sauvegarder` vide les
+    pages modifiées sur disque puis remplace l'état d'un bloc (os.replace).
+    Après un arrêt brutal, rouvrir le même chemin reprend la colonie à la
+    dernière sauvegarde, à une itération de dépôts près. Le fichier reste
+    cohérent avec le facteur de l'état : la colonie n'y écrit qu'en valeurs
+    brutes, et le seul changement de facteur (`replier`) passe par une copie.
+
+    Les matrices de travail (heuristique, choice-info) sont aussi placées
+    dans des fichiers voisins (`tampon`) : recalculables, elles ne font pas
+    partie de l'état.
+    """
+
+    def __init__(self, chemin, n):
+        if np is None:
+            raise ImportError("Les phéromones sur disque nécessitent NumPy")
+        self.chemin = os.fspath(chemin)
+        self.chemin_etat = self.chemin + ".json"
+        self.chemin_repli = self.chemin + ".repli.npy"
+        self.n = n
+        self.etat = None
+        if os.path.exists(self.chemin) and os.path.exists(self.chemin_etat):
+            # Reprise : la forme doit correspondre, sans quoi on n'écrase rien
+            self.pheromones = ouvrir_matrice(self.chemin, (n, n), mode="r+")
+            with open(self.chemin_etat, encoding="utf-8") as f:
+                self.etat = json.load(f)
+            if self.etat.pop("repli", False):
+                # Arrêt pendant la recopie d'un repli : elle est refaite
+                np.copyto(self.pheromones, ouvrir_matrice(self.chemin_repli, (n, n), mode="r"))
+                self.sauvegarder(self.etat)
+        else:
+            self.pheromones = ouvrir_matrice(self.chemin, (n, n))
+            self.pheromones.fill(1.0)
+        if os.path.exists(self.chemin_repli):
+            # Repli interrompu avant d'être validé, ou déjà recopié
+            os.remove(self.chemin_repli)
+
+    def tampon(self, nom, forme, dtype):
+        return ouvrir_matrice(f"{self.chemin}.{nom}.npy", forme, dtype)
+
+    def replier(self, facteur, etat):
+        """
+        Multiplie la matrice par `facteur` et sauvegarde `etat` (qui porte le
+        nouveau facteur global). La matrice repliée est d'abord écrite à
+        côté, puis désignée par l'état avant d'être recopiée : un arrêt
+        brutal ne laisse jamais des cases repliées face à l'ancien facteur.
+        """
+        copie = ouvrir_matrice(self.chemin_repli, self.pheromones.shape)
+        np.multiply(self.pheromones, facteur, out=copie)
+        copie.flush()
+        self.sauvegarder({**etat, "repli": True})
+        np.copyto(self.pheromones, copie)
+        del copie
+        self.sauvegarder(etat)
+        os.remove(self.chemin_repli)
+
+    def sauvegarder(self, etat):
+        self.pheromones.flush()
+        temporaire = self.chemin_etat + ".tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(etat, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.chemin_etat)
+        self.etat = etat
@@ -0,0 +1,102 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les instantanés du moteur "python" s'en passent
+    np = None
+
+
+class LigneInstantane:
+    """
+    Ligne i en lecture seule d'un instantané : `ligne[j]` lit et met à
+    l'échelle une seule case, sans copier la ligne. L'itération et
+    np.asarray(ligne) passent par une copie de la ligne entière.
+    """
+
+    def __init__(self, instantane, i):
+        self._instantane = instantane
+        self._i = i
+
+    def __len__(self):
+        return len(self._instantane)
+
+    def __getitem__(self, j):
+        return self._instantane.valeur(self._i, j)
+
+    def __iter__(self):
+        return iter(self._instantane.ligne(self._i))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._instantane.ligne(self._i), dtype=dtype)
+
+
+class Instantane:
+    """
+    Phéromones publiées par la colonie à la fin d'une itération, en lecture
+    seule.
+
+    L'instantané garde le tampon brut et le facteur global du moment : sa
+    création ne copie rien. C'est la colonie qui, avant de modifier ce
+    tampon, bascule sur son second tampon si l'instantané a été remis à un
+    lecteur (voir AntColony.instantane) ; un instantané n'est donc jamais
+    modifié après coup et se lit sans verrou.
+
+    S'indexe comme la matrice des phéromones (`instantane[i][j]` en O(1),
+    itération sur les lignes) ; `ligne(i)` copie une ligne et `tableau()`
+    toute la matrice. `statistiques` porte les agrégats de la colonie au
+    même moment (total, moyenne, maximum, longueurs) : les lire ne parcourt
+    pas la matrice, sauf pour un maximum que la colonie ne connaissait pas
+    (calculé alors sur le tampon de l'instantané, une fois).
+
+    Avec `verrou` (phéromones sur disque, voir fichiers.py), la colonie ne
+    change pas de tampon mais fait passer l'instantané sur une copie : les
+    cases et les lignes sont alors lues sous ce verrou.
+    """
+
+    def __init__(self, tampon, echelle, iteration, statistiques=None, verrou=None):
+        self._tampon = tampon
+        self.echelle = echelle
+        self.iteration = iteration
+        self._statistiques = statistiques
+        self._verrou = verrou
+
+    @property
+    def statistiques(self):
+        if self._statistiques is not None and self._statistiques.maximum is None:
+            if self._verrou is not None:
+                with self._verrou:
+                    maximum = float(self._tampon.max())
+            else:
+                maximum = float(self._tampon.max())
+            self._statistiques = self._statistiques._replace(maximum=maximum * self.echelle)
+        return self._statistiques
+
+    def __len__(self):
+        return len(self._tampon)
+
+    def __getitem__(self, i):
+        return LigneInstantane(self, i)
+
+    def valeur(self, i, j):
+        if self._verrou is not None:
+            with self._verrou:
+                return self._tampon[i, j] * self.echelle
+        return self._tampon[i, j] * self.echelle
+
+    def ligne(self, i):
+        if self._verrou is not None:
+            with self._verrou:
+                ligne = np.array(self._tampon[i]) * self.echelle
+        elif np is not None:
+            ligne = np.asarray(self._tampon[i], dtype=float) * self.echelle
+        else:
+            return [valeur * self.echelle for valeur in self._tampon[i]]
+        ligne.flags.writeable = False
+        return ligne
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self._tampon)))
+
+    def tableau(self):
+        if self._verrou is not None:
+            with self._verrou:
+                return np.asarray(self._tampon, dtype=float) * self.echelle
+        return np.asarray(self._tampon, dtype=float) * self.echelle
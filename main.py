@@ -4,6 +4,16 @@ import math
 import time
 import threading
 from aco import AntColony
+from matrices import matrice_distances
+
+try:
+    import numpy as np
+except ImportError:  # sans NumPy, matrice_distances renvoie une MatriceCompacte
+    np = None
+
+# Le moteur "python" lit la matrice case par case : sur un tableau NumPy, le
+# moteur vectorisé est nettement plus rapide.
+MOTEUR = "numpy" if np is not None else "python"
 
 
 def main(page: ft.Page):
@@ -82,21 +92,8 @@ def main(page: ft.Page):
         page.update()
     
     def calculer_distances():
-        n=len(nodes)
-        M = [] 
-        for i in range(n):
-            row = []
-            for j in range(n):
-                if i == j:
-                    row.append(0)
-                else:
-                    # Distance euclidienne
-                    dx = nodes[i][0] - nodes[j][0]
-                    dy = nodes[i][1] - nodes[j][1]
-                    distance = math.sqrt(dx * dx + dy * dy)
-                    row.append(distance)
-            M.append(row)
-        return M
+        # Matrice construite par blocs vectorisés (voir matrices.py)
+        return matrice_distances(nodes)
     
     distances = calculer_distances()
     pheromones = [[1.0 for _ in range(len(nodes))] for _ in range(len(nodes))]
@@ -133,9 +130,11 @@ def main(page: ft.Page):
         # Liste de formes graphiques à afficher dans le Stack
         shapes = []
         
-        if pheromones and len(pheromones) > 0:
+        if len(pheromones) > 0:
             # Valeur maximale des phéromones (pour normalisation)
-            max_pheromone = max(max(row) for row in pheromones) if pheromones else 1
+            # (tenue à jour par la colonie ; parcours seulement avant le premier run)
+            statistiques = getattr(pheromones, "statistiques", None)
+            max_pheromone = statistiques.maximum if statistiques else max(max(row) for row in pheromones)
 
             # Parcours de toutes les paires de nœuds
             for i in range(len(nodes)):
@@ -204,6 +203,8 @@ def main(page: ft.Page):
         iteration = iter_num
         best_path = current_best_path[0] if current_best_path else []
         pheromones = current_pheromones
+        # La colonie ne fait plus de pause : on rythme l'affichage ici
+        time.sleep(0.1)
 
         async def update_ui():
             # Affichage du numéro d’itération
@@ -216,8 +217,10 @@ def main(page: ft.Page):
                     f"(longueur: {current_best_path[1]:.2f})"
                 )
 
-            # Calcul de la moyenne des phéromones
-            avg = sum(sum(row) for row in pheromones) / (len(nodes) ** 2)
+            # Moyenne des phéromones, tenue à jour par la colonie (une matrice
+            # brute, envoyée par MultiColonies.run, est parcourue)
+            statistiques = getattr(current_pheromones, "statistiques", None)
+            avg = statistiques.moyenne if statistiques else sum(sum(row) for row in current_pheromones) / (len(nodes) ** 2)
             pheromone_text.value = f"Phéromones moyennes: {avg:.4f}"
 
             # Redessiner le graphe
@@ -253,10 +256,11 @@ def main(page: ft.Page):
                 float(decay_field.value),
                 float(alpha_field.value),
                 float(beta_field.value),
+                engine=MOTEUR,
             )
         except ValueError:
             # Valeurs par défaut en cas d’erreur utilisateur
-            colony = AntColony(distances, 15, 3, 100, 0.95, 1, 2)
+            colony = AntColony(distances, 15, 3, 100, 0.95, 1, 2, engine=MOTEUR)
 
         # Lancement de l’algorithme
         colony.run(update_callback, stop_event)
@@ -272,8 +276,12 @@ def main(page: ft.Page):
             start_btn.disabled = False
             stop_btn.disabled = True
             # Update the status text
-            status_text.value = "Terminé"
-            status_text.color = "green"
+            if colony.statut == "annule":
+                status_text.value = "Arrêté"
+                status_text.color = "red"
+            else:
+                status_text.value = "Terminé"
+                status_text.color = "green"
 
             page.update()
 
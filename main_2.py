@@ -4,6 +4,16 @@ import math
 import time
 import threading
 from aco import AntColony
+from matrices import matrice_distances
+
+try:
+    import numpy as np
+except ImportError:  # sans NumPy, matrice_distances renvoie une MatriceCompacte
+    np = None
+
+# Le moteur "python" lit la matrice case par case : sur un tableau NumPy, le
+# moteur vectorisé est nettement plus rapide.
+MOTEUR = "numpy" if np is not None else "python"
 
 
 def main(page: ft.Page):
@@ -59,19 +69,8 @@ def main(page: ft.Page):
     # Fonctions graphe
     # =====================
     def calculer_distances():
-        n = len(nodes)
-        M = []
-        for i in range(n):
-            row = []
-            for j in range(n):
-                if i == j:
-                    row.append(0)
-                else:
-                    dx = nodes[i][0] - nodes[j][0]
-                    dy = nodes[i][1] - nodes[j][1]
-                    row.append(math.sqrt(dx * dx + dy * dy))
-            M.append(row)
-        return M
+        # Matrice construite par blocs vectorisés (voir matrices.py)
+        return matrice_distances(nodes)
 
     def generer_nodes():
         nonlocal nodes, distances, pheromones
@@ -102,8 +101,10 @@ def main(page: ft.Page):
         shapes = []
 
         # Phéromones
-        if pheromones:
-            max_ph = max(max(row) for row in pheromones)
+        if len(pheromones) > 0:
+            # Maximum tenu à jour par la colonie ; parcours seulement avant le premier run
+            statistiques = getattr(pheromones, "statistiques", None)
+            max_ph = statistiques.maximum if statistiques else max(max(row) for row in pheromones)
             for i in range(len(nodes)):
                 for j in range(i + 1, len(nodes)):
                     if pheromones[i][j] > 0.1:
@@ -160,6 +161,8 @@ def main(page: ft.Page):
 
         iteration = iter_num
         pheromones = current_pheromones
+        # La colonie ne fait plus de pause : on rythme l'affichage ici
+        time.sleep(0.1)
 
         # Normalisation propre du meilleur chemin
         if isinstance(current_best, tuple) and isinstance(current_best[0], list):
@@ -173,7 +176,9 @@ def main(page: ft.Page):
             pass
 
         iteration_text.value = f"Itération : {iteration}"
-        avg = sum(sum(row) for row in pheromones) / (len(nodes) ** 2)
+        # Tenue à jour par la colonie ; parcours pour une matrice brute (MultiColonies.run)
+        statistiques = getattr(current_pheromones, "statistiques", None)
+        avg = statistiques.moyenne if statistiques else sum(sum(row) for row in current_pheromones) / (len(nodes) ** 2)
         pheromone_text.value = f"Phéromones moyennes : {avg:.4f}"
 
         dessiner_graphe()
@@ -205,12 +210,17 @@ def main(page: ft.Page):
             float(decay_field.value),
             float(alpha_field.value),
             float(beta_field.value),
+            engine=MOTEUR,
         )
         colony.run(update_callback, stop_event)
 
         running = False
-        status_text.value = "Terminé"
-        status_text.color = "green"
+        if colony.statut == "annule":
+            status_text.value = "Arrêté"
+            status_text.color = "red"
+        else:
+            status_text.value = "Terminé"
+            status_text.color = "green"
         start_btn.disabled = False
         stop_btn.disabled = True
         page.update()
@@ -0,0 +1,569 @@
+import copy
+import math
+import threading
+from array import array
+from collections import OrderedDict
+
+from fichiers import ouvrir_matrice
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les matrices sont alors construites en Python pur
+    np = None
+
+# Lignes calculées par bloc : la différence de coordonnées d'un bloc tient en
+# BLOC x n valeurs, jamais n x n x 2
+BLOC = 1024
+
+# Codes array.array des types acceptés, pour le cas sans NumPy
+CODES = {"float32": "f", "float64": "d"}
+
+
+def matrice_distances(coordonnees, dtype="float64", condensee=False, fichier=None):
+    """
+    Matrice des distances euclidiennes entre des points (liste de (x, y) ou
+    tableau n x d).
+
+    Avec NumPy, renvoie un tableau n x n du type `dtype` (float32 ou
+    float64) calculé par blocs de lignes ; sans NumPy, une MatriceCompacte
+    du même type.
+    Avec `condensee=True`, renvoie une MatriceCondensee qui ne stocke que le
+    triangle supérieur. Avec `fichier`, les blocs sont écrits dans ce
+    fichier .npy, rouvert ensuite en lecture seule (numpy.memmap) : la
+    matrice ne passe jamais entière en mémoire, et plusieurs processus
+    peuvent lire le même fichier sans copie (np.load(fichier, mmap_mode="r")).
+    """
+    dtype = np.dtype(dtype).name if np is not None else str(dtype)
+    if dtype not in CODES:
+        raise ValueError(f"Type inconnu : {dtype!r} (attendu : {', '.join(CODES)})")
+    if condensee:
+        return MatriceCondensee.depuis_coordonnees(coordonnees, dtype)
+    if np is None:
+        return MatriceCompacte(array(CODES[dtype], (math.dist(a, b) for a in coordonnees for b in coordonnees)),
+                               len(coordonnees))
+    points = np.asarray(coordonnees, dtype=float)
+    n = len(points)
+    distances = np.empty((n, n), dtype=dtype) if fichier is None else ouvrir_matrice(fichier, (n, n), dtype)
+    for debut in range(0, n, BLOC):
+        bloc = points[debut:debut + BLOC]
+        distances[debut:debut + BLOC] = np.sqrt(((bloc[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1))
+    np.fill_diagonal(distances, 0.0)
+    if fichier is not None:
+        distances.flush()
+        return ouvrir_matrice(fichier, (n, n), mode="r")
+    return distances
+
+
+class LigneCondensee:
+    """Ligne i d'une MatriceCondensee : `ligne[j]` en O(1), sans copie."""
+
+    def __init__(self, matrice, i):
+        self.matrice = matrice
+        self.i = i
+
+    def __len__(self):
+        return self.matrice.n
+
+    def __getitem__(self, j):
+        return self.matrice.valeur(self.i, j)
+
+    def __setitem__(self, j, valeur):
+        self.matrice[self.i, j] = valeur
+
+    def __iter__(self):
+        return (self.matrice.valeur(self.i, j) for j in range(self.matrice.n))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.matrice.ligne(self.i), dtype=dtype)
+
+
+class MatriceCondensee:
+    """
+    Matrice symétrique à diagonale nulle stockée par son seul triangle
+    supérieur (n(n-1)/2 valeurs, comme scipy.spatial.distance.pdist).
+
+    S'indexe comme une matrice pleine : `m[i][j]`, `m[i, j]` (scalaires ou
+    tableaux d'indices, en lecture comme en écriture : m[i, j] et m[j, i]
+    sont la même case), `m[debut:fin]` pour un bloc de lignes pleines, et
+    `ligne(i)` pour une ligne. `np.asarray(m)` la déplie en matrice n x n.
+    Sert aux distances comme aux phéromones du mode symétrique d'AntColony.
+    """
+
+    def __init__(self, valeurs, n):
+        self.valeurs = valeurs
+        self.n = n
+
+    @classmethod
+    def depuis_coordonnees(cls, coordonnees, dtype="float64"):
+        n = len(coordonnees)
+        if np is None:
+            valeurs = array(CODES[dtype], (math.dist(coordonnees[i], coordonnees[j])
+                                           for i in range(n) for j in range(i + 1, n)))
+            return cls(valeurs, n)
+        points = np.asarray(coordonnees, dtype=float)
+        valeurs = np.empty(n * (n - 1) // 2, dtype=dtype)
+        for i in range(n - 1):
+            debut = cls.indice(n, i, i + 1)
+            valeurs[debut:debut + n - i - 1] = np.sqrt(((points[i + 1:] - points[i]) ** 2).sum(axis=-1))
+        return cls(valeurs, n)
+
+    @classmethod
+    def pleine(cls, n, valeur=1.0, numpy=True):
+        # Toutes les cases hors diagonale à `valeur` ; array('d') sans NumPy
+        taille = n * (n - 1) // 2
+        if numpy:
+            return cls(np.full(taille, valeur, dtype=float), n)
+        return cls(array("d", [valeur]) * taille, n)
+
+    @staticmethod
+    def indice(n, i, j):
+        # Position de (i, j), i < j, dans le triangle supérieur ligne par ligne
+        return n * i - i * (i + 1) // 2 + j - i - 1
+
+    def paires(self, k):
+        # Inverse d'indice : (i, j), i < j, de la position k (scalaire ou tableau)
+        n = self.n
+        if np is not None and np.ndim(k):
+            k = np.asarray(k)
+            i = n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2 - 0.5).astype(np.intp)
+        else:
+            i = n - 2 - int(math.floor(math.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2 - 0.5))
+        return i, k + i + 1 - n * (n - 1) // 2 + (n - i) * (n - i - 1) // 2
+
+    def valeur(self, i, j):
+        if i == j:
+            return 0.0
+        if i > j:
+            i, j = j, i
+        return self.valeurs[self.indice(self.n, i, j)]
+
+    def ligne(self, i):
+        if np is None:
+            return [self.valeur(i, j) for j in range(self.n)]
+        j = np.arange(self.n)
+        bas, haut = np.minimum(i, j), np.maximum(i, j)
+        ligne = np.asarray(self.valeurs)[np.where(i == j, 0, self.indice(self.n, bas, haut))]
+        ligne[i] = 0.0
+        return ligne
+
+    def lignes(self, debut, fin):
+        fin = min(fin, self.n)
+        return np.array([self.ligne(i) for i in range(debut, fin)]).reshape(fin - debut, self.n)
+
+    def pairs(self, I, J):
+        # Éléments (I[k], J[k]) ; la diagonale vaut 0
+        I, J = np.asarray(I), np.asarray(J)
+        positions = self.indice(self.n, np.minimum(I, J), np.maximum(I, J))
+        return np.where(I == J, 0.0, np.asarray(self.valeurs)[np.where(I == J, 0, positions)])
+
+    @property
+    def dtype(self):
+        return np.asarray(self.valeurs).dtype
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, indices):
+        if isinstance(indices, tuple):
+            if np is not None and (np.ndim(indices[0]) or np.ndim(indices[1])):
+                return self.pairs(*indices)
+            return self.valeur(*indices)
+        if isinstance(indices, slice):
+            return self.lignes(*indices.indices(self.n)[:2])
+        return LigneCondensee(self, indices)
+
+    def __setitem__(self, indices, valeurs):
+        # Cases hors diagonale seulement
+        i, j = indices
+        if np is not None and (np.ndim(i) or np.ndim(j)):
+            self.valeurs[self.indice(self.n, np.minimum(i, j), np.maximum(i, j))] = valeurs
+        else:
+            self.valeurs[self.indice(self.n, min(i, j), max(i, j))] = valeurs
+
+    def __iter__(self):
+        return (LigneCondensee(self, i) for i in range(self.n))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.lignes(0, self.n), dtype=dtype)
+
+    def __imul__(self, facteur):
+        if np is not None and isinstance(self.valeurs, np.ndarray):
+            self.valeurs *= facteur
+        else:
+            for k in range(len(self.valeurs)):
+                self.valeurs[k] *= facteur
+        return self
+
+    def fill(self, valeur):
+        if np is not None and isinstance(self.valeurs, np.ndarray):
+            self.valeurs.fill(valeur)
+        else:
+            self.valeurs[:] = array(self.valeurs.typecode, [valeur]) * len(self.valeurs)
+
+    def copy(self):
+        # ndarray.copy(), ou tranche complète d'un array('d')
+        return MatriceCondensee(self.valeurs.copy() if hasattr(self.valeurs, "copy") else self.valeurs[:], self.n)
+
+    def sum(self):
+        # Somme sur la matrice pleine : chaque case stockée compte deux fois
+        if np is not None and isinstance(self.valeurs, np.ndarray):
+            return 2 * float(self.valeurs.sum())
+        return 2 * sum(self.valeurs)
+
+    def max(self):
+        return float(max(self.valeurs))
+
+
+class MatriceCompacte:
+    """
+    Matrice n x n pleine dans un seul tampon contigu array('d') (ou 'f'),
+    ligne par ligne : 8 (ou 4) octets par case, au lieu d'un float Python
+    par case dans une liste de listes.
+
+    S'utilise comme une liste de listes : `m[i][j]` en lecture comme en
+    écriture, `len(m)`, itération sur les lignes, qui sont des memoryview
+    du tampon (aucune copie). `m[i, j]` lit ou écrit une case directement.
+    Le tampon expose le protocole buffer : `memoryview(m)` (Python 3.12+)
+    ou `m.vue()` en donne une vue n x n, et `np.asarray(m)` le partage sans
+    copie, ce qui permet aussi de le placer en mémoire partagée.
+    """
+
+    def __init__(self, valeurs, n):
+        self.valeurs = valeurs
+        self.n = n
+        vue = memoryview(valeurs)
+        self._lignes = [vue[i * n:(i + 1) * n] for i in range(n)]
+
+    @classmethod
+    def pleine(cls, n, valeur=0.0, typecode="d"):
+        return cls(array(typecode, [valeur]) * (n * n), n)
+
+    @classmethod
+    def depuis_lignes(cls, lignes, typecode="d"):
+        # Copie d'une liste de listes (ou de tout itérable de lignes)
+        lignes = list(lignes)
+        return cls(array(typecode, (valeur for ligne in lignes for valeur in ligne)), len(lignes))
+
+    def __reduce__(self):
+        # Les memoryview des lignes ne se sérialisent pas : seul le tampon voyage
+        return (MatriceCompacte, (self.valeurs, self.n))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, tuple):
+            return self.valeurs[i[0] * self.n + i[1]]
+        return self._lignes[i]
+
+    def __setitem__(self, indices, valeur):
+        i, j = indices
+        self.valeurs[i * self.n + j] = valeur
+
+    def __iter__(self):
+        return iter(self._lignes)
+
+    def vue(self):
+        return memoryview(self.valeurs).cast("B").cast(self.valeurs.typecode, (self.n, self.n))
+
+    def __buffer__(self, flags):
+        return self.vue()
+
+    def __array__(self, dtype=None, copy=None):
+        # Vue sur le tampon, sauf copie demandée (copy=True) ou imposée par un
+        # changement de type, que copy=False interdit (protocole NumPy 2)
+        tableau = np.frombuffer(self.valeurs, dtype=self.valeurs.typecode).reshape(self.n, self.n)
+        if dtype is not None and np.dtype(dtype) != tableau.dtype:
+            if copy is False:
+                raise ValueError(f"Conversion de {tableau.dtype} en {np.dtype(dtype)} impossible sans copie")
+            return tableau.astype(dtype)
+        return tableau.copy() if copy else tableau
+
+    def __imul__(self, facteur):
+        valeurs = self.valeurs
+        for k in range(len(valeurs)):
+            valeurs[k] *= facteur
+        return self
+
+    def fill(self, valeur):
+        self.valeurs[:] = array(self.valeurs.typecode, [valeur]) * len(self.valeurs)
+
+    def copy(self):
+        return MatriceCompacte(self.valeurs[:], self.n)
+
+    def sum(self):
+        return sum(self.valeurs)
+
+    def max(self):
+        return max(self.valeurs)
+
+
+class LigneOracle:
+    """Ligne i d'un OracleDistances : `ligne[j]` calcule une seule distance."""
+
+    def __init__(self, oracle, i):
+        self.oracle = oracle
+        self.i = i
+
+    def __len__(self):
+        return len(self.oracle)
+
+    def __getitem__(self, j):
+        return self.oracle.distance(self.i, j)
+
+    def __iter__(self):
+        return iter(self.oracle.row(self.i))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.oracle.row(self.i), dtype=dtype)
+
+
+class OracleDistances:
+    """
+    Distances euclidiennes calculées à la demande à partir des coordonnées,
+    sans jamais stocker la matrice : O(n) en mémoire au lieu de O(n^2).
+
+    - `oracle[i][j]` (ou `distance(i, j)`) : une distance, en O(1) ;
+    - `row(i)` : la ligne i complète, gardée dans un cache LRU de
+      `taille_cache` lignes ;
+    - `pairs(I, J)` ou `oracle[I, J]` : distances élément par élément entre
+      deux tableaux d'indices de même forme (longueurs de chemins) ;
+    - `oracle[debut:fin]` : un bloc de lignes, calculé sans passer par le
+      cache (parcours complets : heuristique, listes de candidats).
+
+    `np.asarray(oracle)` construit la matrice complète : à réserver aux
+    petites instances.
+    """
+
+    def __init__(self, coordonnees, taille_cache=256, dtype="float64"):
+        self.points = np.asarray(coordonnees, dtype=float) if np is not None else None
+        self._tuples = [tuple(map(float, p)) for p in coordonnees]
+        self.taille_cache = taille_cache
+        self.dtype = np.dtype(dtype) if np is not None else dtype
+        self._cache = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def __getstate__(self):
+        # Envoyé aux processus sans son cache ni son verrou
+        etat = dict(self.__dict__)
+        etat["_cache"], etat["_verrou"] = OrderedDict(), None
+        return etat
+
+    def __setstate__(self, etat):
+        self.__dict__.update(etat)
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        return len(self._tuples)
+
+    def distance(self, i, j):
+        return math.dist(self._tuples[i], self._tuples[j])
+
+    def row(self, i):
+        with self._verrou:
+            ligne = self._cache.get(i)
+            if ligne is not None:
+                self._cache.move_to_end(i)
+                return ligne
+        if np is None:
+            ligne = [self.distance(i, j) for j in range(len(self))]
+        else:
+            ligne = self.lignes(i, i + 1)[0]
+            ligne.flags.writeable = False
+        with self._verrou:
+            self._cache[i] = ligne
+            if len(self._cache) > self.taille_cache:
+                self._cache.popitem(last=False)
+        return ligne
+
+    def lignes(self, debut, fin):
+        bloc = self.points[debut:fin]
+        return np.sqrt(((bloc[:, None, :] - self.points[None, :, :]) ** 2).sum(axis=-1)).astype(self.dtype, copy=False)
+
+    def pairs(self, I, J):
+        if np is None:
+            return [self.distance(i, j) for i, j in zip(I, J)]
+        I, J = np.asarray(I), np.asarray(J)
+        return np.sqrt(((self.points[I] - self.points[J]) ** 2).sum(axis=-1)).astype(self.dtype, copy=False)
+
+    def __getitem__(self, indices):
+        if isinstance(indices, tuple):
+            return self.pairs(*indices)
+        if isinstance(indices, slice):
+            return self.lignes(*indices.indices(len(self))[:2])
+        return LigneOracle(self, indices)
+
+    def __iter__(self):
+        return (LigneOracle(self, i) for i in range(len(self)))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.lignes(0, len(self)), dtype=dtype)
+
+
+def graphe_candidats(candidats, chemins=()):
+    """
+    Graphe fixe du stockage creux : arêtes i -> candidats[i] et arêtes des
+    `chemins`, chacune dans les deux sens. Renvoie (indptr, indices) au
+    format CSR, colonnes triées dans chaque ligne.
+    """
+    candidats = np.asarray(candidats)
+    n = len(candidats)
+    lignes = [np.repeat(np.arange(n), candidats.shape[1])]
+    colonnes = [candidats.ravel()]
+    for chemin in chemins:
+        chemin = np.asarray(chemin)
+        lignes.append(chemin[:-1])
+        colonnes.append(chemin[1:])
+    lignes, colonnes = np.concatenate(lignes), np.concatenate(colonnes)
+    cles = np.unique(np.concatenate([lignes * n + colonnes, colonnes * n + lignes]))
+    lignes, indices = np.divmod(cles, n)
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(lignes, minlength=n), out=indptr[1:])
+    return indptr, indices
+
+
+class MatriceCreuse:
+    """
+    Matrice n x n creuse au format CSR (indptr, indices, valeurs) sur un
+    graphe fixe (voir graphe_candidats) : toutes les cases hors du graphe
+    valent `defaut`, multiplié par `poids[i, j]` si un poids est donné.
+    Mémoire en O(nnz) au lieu de O(n^2).
+
+    S'indexe comme un tableau NumPy pour les usages d'AntColony : `m[i, j]`
+    (scalaires ou tableaux d'indices), `m[i]` (ligne pleine, reconstituée),
+    `m[lignes]` (bloc de lignes pleines). Une écriture hors du graphe est
+    ignorée.
+    """
+
+    def __init__(self, indptr, indices, valeurs, defaut=1.0, poids=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.valeurs = valeurs
+        self.defaut = defaut
+        self.poids = poids
+        self.n = len(indptr) - 1
+        # Ligne de chaque case stockée, et clés i * n + j triées pour la recherche
+        self._lignes = np.repeat(np.arange(self.n), np.diff(indptr))
+        self._cles = self._lignes * self.n + indices
+
+    def avec(self, valeurs, defaut, poids=None):
+        # Même graphe, autres valeurs : la structure est partagée
+        matrice = copy.copy(self)
+        matrice.valeurs, matrice.defaut, matrice.poids = valeurs, defaut, poids
+        return matrice
+
+    def positions(self, I, J):
+        # Position de (I, J) dans `valeurs`, et présence dans le graphe
+        cles = np.asarray(I) * self.n + np.asarray(J)
+        positions = np.minimum(np.searchsorted(self._cles, cles), len(self._cles) - 1)
+        return positions, self._cles[positions] == cles
+
+    def paires(self, k):
+        return self._lignes[k], self.indices[k]
+
+    def lignes_pleines(self, lignes):
+        lignes = np.asarray(lignes)
+        if self.poids is None:
+            bloc = np.full((len(lignes), self.n), self.defaut)
+        else:
+            bloc = self.defaut * self.poids[lignes]
+        debuts = self.indptr[lignes]
+        comptes = self.indptr[lignes + 1] - debuts
+        k = np.repeat(debuts - np.cumsum(comptes) + comptes, comptes) + np.arange(comptes.sum())
+        bloc[np.repeat(np.arange(len(lignes)), comptes), self.indices[k]] = self.valeurs[k]
+        return bloc
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, indices):
+        if isinstance(indices, tuple):
+            positions, presentes = self.positions(*indices)
+            valeurs = self.valeurs[positions]
+            if not np.all(presentes):
+                hors = self.defaut if self.poids is None else self.defaut * self.poids[indices]
+                valeurs = np.where(presentes, valeurs, hors)
+            return valeurs
+        if isinstance(indices, slice):
+            return self.lignes_pleines(np.arange(*indices.indices(self.n)))
+        if np.ndim(indices) == 0:
+            return self.lignes_pleines([indices])[0]
+        return self.lignes_pleines(indices)
+
+    def __setitem__(self, indices, valeurs):
+        positions, presentes = map(np.asarray, self.positions(*indices))
+        self.valeurs[positions[presentes]] = np.broadcast_to(valeurs, positions.shape)[presentes]
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.lignes_pleines(np.arange(self.n)), dtype=dtype)
+
+    def __imul__(self, facteur):
+        self.valeurs *= facteur
+        self.defaut *= facteur
+        return self
+
+    def fill(self, valeur):
+        self.valeurs.fill(valeur)
+        self.defaut = valeur
+
+    def copy(self):
+        return self.avec(self.valeurs.copy(), self.defaut, self.poids)
+
+    def sum(self):
+        # Sans poids : les n^2 - nnz cases hors du graphe valent `defaut`
+        return float(self.valeurs.sum()) + self.defaut * (self.n * self.n - len(self.valeurs))
+
+    def max(self):
+        return max(float(self.valeurs.max()), self.defaut)
+
+
+class HeuristiqueCalculee:
+    """
+    eta^beta = (1 / d)^beta calculée à la demande depuis les distances
+    (tableau, oracle ou matrice condensée), diagonale nulle : rien n'est
+    stocké. S'indexe comme une MatriceCreuse (`h[i, j]`, `h[i]`, `h[lignes]`) ;
+    les lignes d'un oracle sont lues par `row(i)`, donc servies par son cache.
+    """
+
+    def __init__(self, distances, beta):
+        self.distances = distances
+        self.beta = beta
+
+    def __len__(self):
+        return len(self.distances)
+
+    def pairs(self, I, J):
+        I, J = np.asarray(I), np.asarray(J)
+        with np.errstate(divide="ignore"):
+            eta = (1.0 / np.asarray(self.distances[I, J], dtype=float)) ** self.beta
+        return np.where(I == J, 0.0, eta)
+
+    def ligne(self, i):
+        if isinstance(self.distances, OracleDistances):
+            distances = self.distances.row(i)
+        elif isinstance(self.distances, MatriceCondensee):
+            distances = self.distances.ligne(i)
+        else:
+            distances = self.distances[i]
+        with np.errstate(divide="ignore"):
+            eta = (1.0 / np.asarray(distances, dtype=float)) ** self.beta
+        eta[i] = 0.0
+        return eta
+
+    def __getitem__(self, indices):
+        if isinstance(indices, tuple):
+            return self.pairs(*indices)
+        if isinstance(indices, slice):
+            # Parcours complet : par paires, sans remplir le cache de l'oracle
+            indices = np.arange(*indices.indices(len(self)))
+            return self.pairs(indices[:, None], np.arange(len(self)))
+        if np.ndim(indices) == 0:
+            return self.ligne(int(indices))
+        indices = np.asarray(indices)
+        bloc = np.empty(indices.shape + (len(self),))
+        for position, i in np.ndenumerate(indices):
+            bloc[position] = self.ligne(int(i))
+        return bloc
@@ -0,0 +1,209 @@
+import math
+import random
+import traceback
+import multiprocessing
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : les colonies "python" s'en passent
+    np = None
+
+from aco import AntColony
+from matrices import MatriceCompacte, MatriceCondensee, MatriceCreuse
+
+MIGRATIONS = ("chemin", "pheromones")
+
+
+def melanger_pheromones(colonie, autres, poids):
+    # tau <- (1 - poids) * tau + poids * tau_voisine
+    propres = colonie.pheromones
+    if isinstance(propres, MatriceCreuse):
+        # Même graphe de candidats sur toutes les îles : arêtes stockées et
+        # valeur par défaut (hors graphe) mélangées séparément
+        colonie.pheromones = propres.avec((1 - poids) * propres.valeurs + poids * autres.valeurs,
+                                          (1 - poids) * propres.defaut + poids * autres.defaut, propres.poids)
+    elif isinstance(propres, (MatriceCompacte, MatriceCondensee)):
+        # Tampon unique (mode symétrique, ou moteur "python") : mélangé case à case
+        if np is not None and isinstance(propres.valeurs, np.ndarray):
+            valeurs = (1 - poids) * propres.valeurs + poids * autres.valeurs
+        else:
+            valeurs = array("d", ((1 - poids) * a + poids * b for a, b in zip(propres.valeurs, autres.valeurs)))
+        colonie.pheromones = type(propres)(valeurs, propres.n)
+    elif np is not None and isinstance(propres, np.ndarray):
+        colonie.pheromones = (1 - poids) * propres + poids * np.asarray(autres)
+    else:
+        colonie.pheromones = [[(1 - poids) * a + poids * b for a, b in zip(ligne_a, ligne_b)]
+                              for ligne_a, ligne_b in zip(propres, autres)]
+
+
+def accueillir_migrant(colonie, chemin, distance):
+    # Le meilleur chemin d'une voisine renforce la piste comme un dépôt
+    # supplémentaire, selon la règle de la variante : renforcement global en
+    # ACS, dépôt simple sinon (les bornes MMAS s'appliquent à l'itération
+    # suivante). Il devient d'abord le meilleur chemin s'il l'est.
+    if distance < colonie.meilleure_distance:
+        colonie.meilleur_chemin, colonie.meilleure_distance = chemin, distance
+    colonie.proteger_instantane()
+    if colonie.variant == "acs":
+        colonie.renforcer_chemin(chemin, distance, 1 - colonie.decay)
+    else:
+        colonie.deposer_chemin(chemin, distance)
+
+
+class ErreurIle(RuntimeError):
+    """Exception levée dans un processus-île, relevée par le coordinateur."""
+
+
+def _ile(connexion, distances, options, graine):
+    """Boucle d'un processus-île : exécute les ordres du coordinateur."""
+    try:
+        random.seed(graine)
+        colonie = AntColony(distances, **options)
+        while True:
+            ordre, *args = connexion.recv()
+            if ordre == "avancer":
+                n_iterations, migrant = args
+                if migrant is not None:
+                    accueillir_migrant(colonie, *migrant)
+                for _ in range(n_iterations):
+                    colonie.executer_iteration()
+                connexion.send((colonie.meilleur_chemin, colonie.meilleure_distance))
+            elif ordre == "pheromones":
+                connexion.send(colonie.pheromones)
+            elif ordre == "melanger":
+                melanger_pheromones(colonie, *args)
+            else:
+                colonie.fermer()
+                connexion.close()
+                return
+    except Exception:
+        # Transmise telle quelle (trace comprise) plutôt qu'un tube coupé
+        connexion.send(ErreurIle(f"Île de graine {graine} :\n{traceback.format_exc()}"))
+        connexion.close()
+
+
+class MultiColonies:
+    """
+    Modèle en îles : plusieurs AntColony, chacune dans son processus.
+
+    Toutes les `intervalle_migration` itérations, chaque île transmet à sa
+    voisine (topologie en anneau) son meilleur chemin (`migration="chemin"`,
+    déposé comme un dépôt supplémentaire) ou ses phéromones
+    (`migration="pheromones"`, mélangées avec le poids `poids_migration`).
+
+    `variations` est une liste de dictionnaires, un par île, qui remplacent
+    les paramètres communs (alpha, beta, decay...). `run` respecte le même
+    contrat que AntColony.run, le callback étant appelé à chaque migration ;
+    une exception dans une île y est relevée en ErreurIle, avec sa trace.
+    """
+
+    def __init__(self, distances, n_colonies, n_ants, n_best, n_iterations, decay, alpha=1, beta=2,
+                 variations=None, intervalle_migration=10, migration="chemin", poids_migration=0.1,
+                 seed=None, **options):
+        if migration not in MIGRATIONS:
+            raise ValueError(f"Migration inconnue : {migration!r} (attendu : {', '.join(MIGRATIONS)})")
+        self.distances = distances
+        self.n_iterations = n_iterations
+        self.intervalle_migration = intervalle_migration
+        self.migration = migration
+        self.poids_migration = poids_migration
+        self.meilleur_chemin = None
+        self.meilleure_distance = math.inf
+
+        communes = dict(options, n_ants=n_ants, n_best=n_best, n_iterations=n_iterations,
+                        decay=decay, alpha=alpha, beta=beta)
+        variations = variations or [{}] * n_colonies
+        if len(variations) != n_colonies:
+            raise ValueError("variations doit contenir un dictionnaire par colonie")
+        self.options = [dict(communes, **variation) for variation in variations]
+        graine = random.getrandbits(64) if seed is None else seed
+        self.graines = [graine + i for i in range(n_colonies)]
+        self._iles = []
+
+    def demarrer(self):
+        contexte = multiprocessing.get_context("spawn")
+        for options, graine in zip(self.options, self.graines):
+            parent, enfant = contexte.Pipe()
+            processus = contexte.Process(target=_ile, args=(enfant, self.distances, options, graine), daemon=True)
+            processus.start()
+            enfant.close()
+            self._iles.append((processus, parent))
+
+    def fermer(self):
+        for processus, connexion in self._iles:
+            try:
+                connexion.send(("fin",))
+            except (BrokenPipeError, OSError):
+                pass
+        for processus, connexion in self._iles:
+            # Une île encore en plein calcul (arrêt demandé) est interrompue
+            processus.join(timeout=0.5)
+            if processus.is_alive():
+                processus.terminate()
+                processus.join()
+            connexion.close()
+        self._iles = []
+
+    @staticmethod
+    def lire(connexion):
+        reponse = connexion.recv()
+        if isinstance(reponse, ErreurIle):
+            raise reponse
+        return reponse
+
+    def envoyer(self, connexion, *ordre):
+        try:
+            connexion.send(ordre)
+        except (BrokenPipeError, OSError):
+            # Île arrêtée sur une erreur : son exception attend dans le tube
+            if connexion.poll():
+                self.lire(connexion)
+            raise
+
+    def recevoir(self, evenement_arret):
+        # Attente interruptible : un arrêt demandé n'attend pas la fin de l'époque
+        reponses = []
+        for _, connexion in self._iles:
+            while not connexion.poll(0.05):
+                if evenement_arret.is_set():
+                    return None
+            reponses.append(self.lire(connexion))
+        return reponses
+
+    def run(self, callback_maj, evenement_arret):
+        self.demarrer()
+        try:
+            migrants = [None] * len(self._iles)
+            iteration = 0
+            while iteration < self.n_iterations and not evenement_arret.is_set():
+                pas = min(self.intervalle_migration, self.n_iterations - iteration)
+                for (_, connexion), migrant in zip(self._iles, migrants):
+                    self.envoyer(connexion, "avancer", pas, migrant)
+                meilleurs = self.recevoir(evenement_arret)
+                if meilleurs is None:
+                    break
+                iteration += pas
+
+                ile_meilleure = min(range(len(meilleurs)), key=lambda i: meilleurs[i][1])
+                if meilleurs[ile_meilleure][1] < self.meilleure_distance:
+                    self.meilleur_chemin, self.meilleure_distance = meilleurs[ile_meilleure]
+
+                # Migration en anneau : l'île i reçoit de l'île i - 1
+                if self.migration == "chemin":
+                    migrants = meilleurs[-1:] + meilleurs[:-1]
+                    self.envoyer(self._iles[ile_meilleure][1], "pheromones")
+                    pheromones = self.lire(self._iles[ile_meilleure][1])
+                else:
+                    for _, connexion in self._iles:
+                        self.envoyer(connexion, "pheromones")
+                    trainees = self.recevoir(evenement_arret)
+                    if trainees is None:
+                        break
+                    for (_, connexion), voisine in zip(self._iles, trainees[-1:] + trainees[:-1]):
+                        self.envoyer(connexion, "melanger", voisine, self.poids_migration)
+                    pheromones = trainees[ile_meilleure]
+
+                callback_maj(iteration - 1, (self.meilleur_chemin, self.meilleure_distance), pheromones)
+        finally:
+            self.fermer()
@@ -0,0 +1,182 @@
+import sys
+import copy
+import random
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : seul le backend "processus" en dépend
+    np = None
+
+from echantillonneurs import alea
+from fichiers import est_fichier, ouvrir_matrice
+
+# Intervalle (s) de vérification de l'arrêt en attendant le pool de processus
+ATTENTE_ARRET = 0.05
+
+
+def graine_fourmi(graine, iteration, fourmi):
+    """
+    Graine du flux aléatoire propre à une fourmi d'une itération donnée.
+
+    Chaque fourmi tire dans son propre flux : le résultat ne dépend donc
+    pas de la façon dont les fourmis sont réparties entre les processus.
+    Sans NumPy (backend "threads", moteur "python"), la graine est dérivée
+    par le module random : même indépendance, autres valeurs.
+    """
+    if np is None:
+        return random.Random(f"{graine}/{iteration}/{fourmi}").getrandbits(64)
+    return int(np.random.SeedSequence([graine, iteration, fourmi]).generate_state(1, np.uint64)[0])
+
+
+def construire_fourmis(colonie, graines):
+    """Construit un chemin par graine, sans toucher au flux global de `random`."""
+    try:
+        chemins = []
+        for graine in graines:
+            alea.definir(random.Random(graine))
+            chemins.append(colonie.generer_tous_chemins())
+        return chemins
+    finally:
+        alea.definir(random)
+
+
+def gil_actif():
+    # sys._is_gil_enabled n'existe qu'à partir de CPython 3.13
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def decouper(graines, n_lots):
+    taille = -(-len(graines) // n_lots)
+    return [graines[i:i + taille] for i in range(0, len(graines), taille)]
+
+
+def partager(tableau):
+    """Copie `tableau` dans un segment de mémoire partagée et renvoie (segment, vue)."""
+    memoire = shared_memory.SharedMemory(create=True, size=max(tableau.nbytes, 1))
+    vue = np.ndarray(tableau.shape, dtype=tableau.dtype, buffer=memoire.buf)
+    vue[...] = tableau
+    return memoire, vue
+
+
+def rattacher(nom, forme, dtype):
+    memoire = shared_memory.SharedMemory(name=nom)
+    return memoire, np.ndarray(forme, dtype=dtype, buffer=memoire.buf)
+
+
+# État d'un processus de travail : la colonie allégée et ses segments rattachés
+_colonie = None
+_memoires = []
+
+
+def _initialiser(colonie, descripteurs, fichiers):
+    global _colonie
+    for attribut, (nom, forme, dtype) in descripteurs.items():
+        memoire, vue = rattacher(nom, forme, dtype)
+        _memoires.append(memoire)
+        setattr(colonie, attribut, vue)
+    for attribut, (chemin, forme) in fichiers.items():
+        setattr(colonie, attribut, ouvrir_matrice(chemin, forme, mode="r"))
+    if colonie.echantillonneur.statique:
+        colonie.echantillonneur.preparer(colonie._heuristique)
+    _colonie = colonie
+
+
+def _construire(graines, depots, alpha):
+    _colonie._depots = depots
+    _colonie.alpha = alpha
+    return construire_fourmis(_colonie, graines)
+
+
+class PoolFourmis:
+    """
+    Répartit la construction des chemins d'une itération sur un pool de processus.
+
+    Les matrices lues pendant la construction (distances, heuristique et
+    matrice choice-info, seule forme sous laquelle les fourmis lisent les
+    phéromones) sont déplacées en mémoire partagée : la colonie continue de
+    les modifier sur place et les processus ne les reçoivent jamais par pickle.
+    Celles qui sont déjà des fichiers projetés (voir fichiers.py) sont
+    simplement rouvertes par chaque processus, en lecture seule.
+    """
+    PARTAGES = ("_distances", "_heuristique", "_choix")
+
+    def __init__(self, colonie, workers):
+        self.colonie = colonie
+        self.workers = workers
+        self.memoires = {}
+        descripteurs = {}
+        # Un oracle des distances (matrices.OracleDistances) voyage tel quel
+        fichiers = {a: (getattr(colonie, a).filename, getattr(colonie, a).shape)
+                    for a in self.PARTAGES if est_fichier(getattr(colonie, a))}
+        self.partages = [a for a in self.PARTAGES
+                         if isinstance(getattr(colonie, a), np.ndarray) and a not in fichiers]
+        for attribut in self.partages:
+            memoire, vue = partager(getattr(colonie, attribut))
+            self.memoires[attribut] = memoire
+            setattr(colonie, attribut, vue)
+            descripteurs[attribut] = (memoire.name, vue.shape, vue.dtype.str)
+        if colonie.echantillonneur.statique:
+            colonie.echantillonneur.preparer(colonie._heuristique)
+
+        # Colonie allégée envoyée une fois à chaque processus : sans ses
+        # matrices, que les processus rattachent depuis la mémoire partagée
+        legere = copy.copy(colonie)
+        legere.distances = legere._pheromones = legere._pool = legere._evenement_arret = None
+        legere._verrou = legere._lecteurs = legere._publie = legere._pris = legere._reserve = None
+        legere._abonnements, legere._suivi, legere._fichier, legere._aleatoire = [], None, None, None
+        for attribut in [*self.partages, *fichiers]:
+            setattr(legere, attribut, None)
+        legere.echantillonneur = copy.copy(colonie.echantillonneur)
+        if legere.echantillonneur.statique:
+            legere.echantillonneur.preparer(None)
+
+        # "spawn" : la colonie tourne souvent dans un thread de l'interface
+        contexte = multiprocessing.get_context("spawn")
+        self.pool = contexte.Pool(workers, initializer=_initialiser, initargs=(legere, descripteurs, fichiers))
+
+    def construire(self, graines):
+        args = [(lot, self.colonie._depots, self.colonie.alpha) for lot in decouper(graines, self.workers)]
+        resultat = self.pool.starmap_async(_construire, args)
+        while not resultat.ready():
+            # Un arrêt abandonne l'attente ; fermer() interrompra les processus
+            resultat.wait(ATTENTE_ARRET)
+            self.colonie.verifier_arret()
+        return [chemin for lot in resultat.get() for chemin in lot]
+
+    def fermer(self):
+        self.pool.terminate()
+        self.pool.join()
+        # La colonie récupère des copies privées avant la libération des segments
+        for attribut in self.partages:
+            setattr(self.colonie, attribut, np.array(getattr(self.colonie, attribut)))
+        if self.colonie.echantillonneur.statique:
+            self.colonie.echantillonneur.preparer(self.colonie._heuristique)
+        for memoire in self.memoires.values():
+            memoire.close()
+            memoire.unlink()
+        self.memoires = {}
+
+
+class PoolThreads:
+    """
+    Répartit la construction des chemins sur un pool de threads.
+
+    Destiné à CPython sans GIL (3.13t) : les fourmis lisent les matrices de
+    la colonie sans verrou, les dépôts restant faits ensuite par la colonie.
+    Chaque thread a son propre flux aléatoire (voir `alea`).
+    """
+
+    def __init__(self, colonie, workers):
+        self.colonie = colonie
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def construire(self, graines):
+        lots = decouper(graines, self.workers)
+        return [chemin for lot in self.pool.map(construire_fourmis, [self.colonie] * len(lots), lots) for chemin in lot]
+
+    def fermer(self):
+        self.pool.shutdown()
@@ -0,0 +1,184 @@
+from collections import deque
+
+RECHERCHES = ("2-opt", "or-opt", "2-opt+or-opt")
+
+# Amélioration minimale retenue, pour ne pas boucler sur des erreurs d'arrondi
+EPSILON = 1e-9
+
+
+class Tournee:
+    """
+    Chemin ouvert vu comme un cycle fermé par une ville fictive, à distance
+    nulle de toutes les autres : les mouvements de 2-opt et d'Or-opt sur le
+    cycle couvrent ainsi aussi les extrémités du chemin.
+
+    `pos` donne la position de chaque ville, ce qui rend l'évaluation d'un
+    mouvement (delta) en O(1). Suppose des distances symétriques.
+    """
+
+    def __init__(self, chemin, distances):
+        self.fictive = len(chemin)
+        self.villes = list(chemin) + [self.fictive]
+        self.pos = [0] * len(self.villes)
+        for i, ville in enumerate(self.villes):
+            self.pos[ville] = i
+        self.distances = distances
+
+    def d(self, a, b):
+        if a == self.fictive or b == self.fictive:
+            return 0.0
+        return self.distances[a][b]
+
+    def suivante(self, ville):
+        return self.villes[(self.pos[ville] + 1) % len(self.villes)]
+
+    def precedente(self, ville):
+        return self.villes[self.pos[ville] - 1]
+
+    def inverser(self, i, j):
+        # Inverse les positions i..j (sens direct, cycle) ; on inverse le plus
+        # court des deux arcs, ce qui donne le même cycle
+        n = len(self.villes)
+        longueur = (j - i) % n + 1
+        if 2 * longueur > n:
+            i, j, longueur = (j + 1) % n, (i - 1) % n, n - longueur
+        for _ in range(longueur // 2):
+            villes = self.villes
+            villes[i], villes[j] = villes[j], villes[i]
+            self.pos[villes[i]], self.pos[villes[j]] = i, j
+            i, j = (i + 1) % n, (j - 1) % n
+
+    def deplacer(self, debut, longueur, apres, inverse):
+        # Retire le segment de `longueur` villes commençant à `debut` et le
+        # réinsère après la ville `apres`, retourné si `inverse`. Seules les
+        # positions entre le segment et `apres` changent : on réécrit le plus
+        # court des deux arcs qui les séparent, plus le segment lui-même
+        villes, pos = self.villes, self.pos
+        n = len(villes)
+        i = pos[debut]
+        segment = [villes[(i + k) % n] for k in range(longueur)]
+        if inverse:
+            segment.reverse()
+        fin = (i + longueur) % n
+        p = pos[apres]
+        apres_segment = (p - fin) % n + 1
+        avant_segment = n - longueur - apres_segment
+        if apres_segment <= avant_segment:
+            # Villes de fin à `apres` reculées, segment derrière elles
+            ordre = [villes[(fin + k) % n] for k in range(apres_segment)] + segment
+            depart = i
+        else:
+            # Villes entre `apres` et le segment avancées, segment devant elles
+            ordre = segment + [villes[(p + 1 + k) % n] for k in range(avant_segment)]
+            depart = (p + 1) % n
+        for k, ville in enumerate(ordre):
+            q = (depart + k) % n
+            villes[q] = ville
+            pos[ville] = q
+
+    def chemin(self):
+        # Ouvre le cycle à la ville fictive
+        i = self.pos[self.fictive]
+        return self.villes[i + 1:] + self.villes[:i]
+
+
+def deux_opt(tournee, voisins):
+    """
+    2-opt avec listes de voisins et bits "don't look" : seules les villes
+    dont une arête a changé sont réexaminées, et pour chacune seuls ses
+    voisins plus proches que sa voisine actuelle dans le chemin.
+    """
+    a_voir = deque(v for v in tournee.villes if v != tournee.fictive)
+    dans_file = [True] * len(tournee.villes)
+    while a_voir:
+        a = a_voir.popleft()
+        dans_file[a] = False
+        for sens in (1, -1):
+            b = tournee.suivante(a) if sens == 1 else tournee.precedente(a)
+            d_ab = tournee.d(a, b)
+            mouvement = None
+            for c in voisins[a]:
+                d_ac = tournee.d(a, c)
+                if d_ac >= d_ab:
+                    break
+                e = tournee.suivante(c) if sens == 1 else tournee.precedente(c)
+                if c == b or e == a:
+                    continue
+                # Arêtes (a,b) et (c,e) remplacées par (a,c) et (b,e)
+                if d_ac + tournee.d(b, e) - d_ab - tournee.d(c, e) < -EPSILON:
+                    mouvement = (c, e)
+                    break
+            if mouvement is None:
+                continue
+            c, e = mouvement
+            if sens == 1:
+                tournee.inverser(tournee.pos[b], tournee.pos[c])
+            else:
+                tournee.inverser(tournee.pos[a], tournee.pos[e])
+            for ville in (a, b, c, e):
+                if ville != tournee.fictive and not dans_file[ville]:
+                    dans_file[ville] = True
+                    a_voir.append(ville)
+            break
+
+
+def or_opt(tournee, voisins, longueur_max=3):
+    """
+    Or-opt : déplace un segment de 1 à `longueur_max` villes entre deux
+    villes voisines de l'une de ses extrémités, avec bits "don't look".
+    """
+    a_voir = deque(v for v in tournee.villes if v != tournee.fictive)
+    dans_file = [True] * len(tournee.villes)
+    n = len(tournee.villes)
+    while a_voir:
+        s1 = a_voir.popleft()
+        dans_file[s1] = False
+        for longueur in range(1, min(longueur_max, n - 3) + 1):
+            segment = [tournee.villes[(tournee.pos[s1] + k) % n] for k in range(longueur)]
+            if tournee.fictive in segment:
+                break
+            s2 = segment[-1]
+            p, x = tournee.precedente(s1), tournee.suivante(s2)
+            gain = tournee.d(p, s1) + tournee.d(s2, x) - tournee.d(p, x)
+            if gain <= EPSILON:
+                continue
+            mouvement = None
+            for extremite in (s1, s2):
+                for c in voisins[extremite]:
+                    if tournee.d(extremite, c) >= gain:
+                        break
+                    if c in segment:
+                        continue
+                    # Insertion entre c et sa suivante, ou entre sa précédente et c
+                    for g, h in ((c, tournee.suivante(c)), (tournee.precedente(c), c)):
+                        if h in segment or g in segment:
+                            continue
+                        direct = tournee.d(g, s1) + tournee.d(s2, h) - tournee.d(g, h)
+                        inverse = tournee.d(g, s2) + tournee.d(s1, h) - tournee.d(g, h)
+                        if min(direct, inverse) < gain - EPSILON:
+                            mouvement = (g, inverse < direct, h)
+                            break
+                    if mouvement:
+                        break
+                if mouvement:
+                    break
+            if mouvement is None:
+                continue
+            g, retourne, h = mouvement
+            tournee.deplacer(s1, longueur, g, retourne)
+            for ville in (p, x, g, h, s1, s2):
+                if ville != tournee.fictive and not dans_file[ville]:
+                    dans_file[ville] = True
+                    a_voir.append(ville)
+            break
+
+
+def ameliorer(chemin, distances, voisins, methode="2-opt"):
+    """Applique la recherche locale `methode` (voir RECHERCHES) et renvoie le nouveau chemin."""
+    tournee = Tournee(chemin, distances)
+    voisins = list(voisins) + [[]]
+    if methode in ("2-opt", "2-opt+or-opt"):
+        deux_opt(tournee, voisins)
+    if methode in ("or-opt", "2-opt+or-opt"):
+        or_opt(tournee, voisins)
+    return tournee.chemin()
@@ -0,0 +1,101 @@
+import math
+import heapq
+
+
+class GrilleSpatiale:
+    """
+    Index spatial en grille sur des points du plan, environ deux points
+    par case : les voisins d'un point se cherchent case par case, en
+    anneaux de plus en plus larges, au lieu de parcourir toutes les
+    distances.
+
+    - `k_plus_proches(k)` : les k plus proches voisins de chaque point, en
+      O(n k log k) pour des points à peu près uniformes ;
+    - `tournee_plus_proche_voisin(depart)` : chemin glouton du plus proche
+      voisin, sans matrice des distances.
+
+    Les égalités de distance sont départagées par le plus petit indice,
+    comme np.argmin sur une ligne de la matrice des distances.
+    """
+
+    def __init__(self, points):
+        if any(len(p) != 2 for p in points):
+            raise ValueError("La grille spatiale attend des points du plan (x, y)")
+        self.points = [(float(p[0]), float(p[1])) for p in points]
+        n = len(self.points)
+        xs = [x for x, _ in self.points]
+        ys = [y for _, y in self.points]
+        self.x_min, self.y_min = min(xs), min(ys)
+        largeur, hauteur = max(xs) - self.x_min, max(ys) - self.y_min
+        if largeur * hauteur > 0:
+            self.cote = math.sqrt(2 * largeur * hauteur / n)
+        else:
+            # Points alignés (ou confondus) : cases le long de la seule dimension
+            self.cote = max(largeur, hauteur) / n or 1.0
+        self.nx = int(largeur / self.cote) + 1
+        self.ny = int(hauteur / self.cote) + 1
+        self.cellules = [[] for _ in range(self.nx * self.ny)]
+        for i, (x, y) in enumerate(self.points):
+            self.cellules[self.cellule(x, y)].append(i)
+
+    def case(self, x, y):
+        return (min(int((x - self.x_min) / self.cote), self.nx - 1),
+                min(int((y - self.y_min) / self.cote), self.ny - 1))
+
+    def cellule(self, x, y):
+        cx, cy = self.case(x, y)
+        return cx * self.ny + cy
+
+    def anneau(self, cx, cy, r):
+        # Cases à distance de Tchebychev r de (cx, cy), dans la grille
+        if r == 0:
+            yield cx * self.ny + cy
+            return
+        for x in range(max(cx - r, 0), min(cx + r, self.nx - 1) + 1):
+            for y in (cy - r, cy + r):
+                if 0 <= y < self.ny:
+                    yield x * self.ny + y
+        for y in range(max(cy - r + 1, 0), min(cy + r - 1, self.ny - 1) + 1):
+            for x in (cx - r, cx + r):
+                if 0 <= x < self.nx:
+                    yield x * self.ny + y
+
+    def chercher(self, i, k):
+        """Les k points (au plus) les plus proches de i parmi ceux de la grille, du plus proche au plus lointain."""
+        x, y = self.points[i]
+        cx, cy = self.case(x, y)
+        # Tas des k meilleurs (d, j), le pire en tête via (-d, -j)
+        meilleurs = []
+        r_max = max(self.nx, self.ny)
+        for r in range(r_max + 1):
+            for cellule in self.anneau(cx, cy, r):
+                for j in self.cellules[cellule]:
+                    if j == i:
+                        continue
+                    cle = (-math.dist((x, y), self.points[j]), -j)
+                    if len(meilleurs) < k:
+                        heapq.heappush(meilleurs, cle)
+                    elif cle > meilleurs[0]:
+                        heapq.heapreplace(meilleurs, cle)
+            # Tout point des anneaux suivants est à plus de r * cote
+            if len(meilleurs) == k and -meilleurs[0][0] < r * self.cote:
+                break
+        return [-j for _, j in sorted(meilleurs, reverse=True)]
+
+    def k_plus_proches(self, k):
+        return [self.chercher(i, k) for i in range(len(self.points))]
+
+    def tournee_plus_proche_voisin(self, depart=0):
+        # Les villes visitées sont retirées de la grille au fur et à mesure
+        originales = self.cellules
+        self.cellules = [list(cellule) for cellule in originales]
+        try:
+            chemin = [depart]
+            self.cellules[self.cellule(*self.points[depart])].remove(depart)
+            for _ in range(len(self.points) - 1):
+                prochaine = self.chercher(chemin[-1], 1)[0]
+                self.cellules[self.cellule(*self.points[prochaine])].remove(prochaine)
+                chemin.append(prochaine)
+            return chemin
+        finally:
+            self.cellules = originales